@@ -0,0 +1,219 @@
+#Benchmarks for the fuzzy inference and EA hot paths
+#Times every case over its sizes, reports throughput and peak (traced) memory, saves the results as JSON
+#and flags cases that got slower than a stored baseline
+#   python benchmarks/benchmark.py --output results.json
+#   python benchmarks/benchmark.py --baseline results.json --tolerance 0.25
+#   python benchmarks/benchmark.py --quick --filter centroid
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import itertools
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "fuzzy"))
+sys.path.insert(0, os.path.join(ROOT, "evolution"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+from memberships import TrapizoidalMembership, GaussianMembership
+from fis import Rule, RuleBase, TSKRule, TSKRuleBase, zadeh_and, product_and
+from zadeh_fis import RuleGenerator
+
+#Every case is (name, sizes, setup), setup(**size) returns (function to time, items it handles per call)
+#quick sizes are the first of each list
+CASES = []
+def case(name, **sizes):
+    def register(setup):
+        CASES.append((name, sizes, setup))
+        return setup
+    return register
+
+def trapezoid(x_step):
+    return TrapizoidalMembership(-10, 10, [-8, -3, 2, 6], x_step=x_step)
+
+@case("interp", x_step=[1.0, 0.1, 0.01])
+def interp_case(x_step):
+    mem = trapezoid(x_step)
+    xs = np.random.default_rng(0).uniform(-10, 10, 1000).tolist()
+    return (lambda: [mem.interp(x) for x in xs]), len(xs)
+
+@case("interp_many", x_step=[1.0, 0.1, 0.01])
+def interp_many_case(x_step):
+    mem = trapezoid(x_step)
+    xs = np.random.default_rng(0).uniform(-10, 10, 100000)
+    return (lambda: mem.interp_many(xs)), len(xs)
+
+#caches are cleared so every call integrates
+@case("centroid", dx=[0.1, 0.01, 0.001, None])
+def centroid_case(dx):
+    mem = GaussianMembership(-10, 10, 1, 2, x_step=0.01)
+    def run():
+        mem.clear_cache()
+        return mem.centroid(dx)
+    return run, 1
+
+def make_rules(n_rules, n_anecedents, x_step = 0.5):
+    rng = np.random.default_rng(n_rules * 100 + n_anecedents)
+    rules = []
+    for _ in range(n_rules):
+        anecedents = [GaussianMembership(0, 100, rng.uniform(0, 100), rng.uniform(5, 30)) for _ in range(n_anecedents)]
+        #sampled trapezoids need their points exactly on the grid
+        a, b = np.sort(rng.choice(np.arange(-8, 9), 2, replace=False))
+        rules.append(Rule(anecedents, TrapizoidalMembership(-10, 10, [a - 1, a, b, b + 1], x_step=x_step)))
+    return rules
+
+@case("rule_evaluate", n_anecedents=[1, 3, 5], and_op=["zadeh_and", "product_and"])
+def rule_evaluate_case(n_anecedents, and_op):
+    rule = make_rules(1, n_anecedents)[0]
+    op = {"zadeh_and": zadeh_and, "product_and": product_and}[and_op]
+    X = np.random.default_rng(1).uniform(0, 100, (1000, n_anecedents)).tolist()
+    return (lambda: [rule.evaluate(x, op) for x in X]), len(X)
+
+@case("defuzzify", aggregation_op=["max_min", "averaging", "root_sum_square", "center_of_mass", "sum"], n_rules=[3, 10])
+def defuzzify_case(aggregation_op, n_rules):
+    rules = make_rules(n_rules, 2)
+    strengths = np.random.default_rng(2).uniform(0, 1, n_rules).tolist()
+    def run():
+        for rule in rules:
+            rule.consequent.clear_cache()
+        return Rule.defuzzify(rules, strengths, aggregation_op, dx=0.01)
+    return run, 1
+
+@case("rule_base_infer", aggregation_op=["max_min", "sum"], n_rules=[3, 10, 30])
+def rule_base_case(aggregation_op, n_rules):
+    rule_base = RuleBase(make_rules(n_rules, 3), aggregation_op=aggregation_op, dx=0.01)
+    X = np.random.default_rng(3).uniform(0, 100, (10000, 3))
+    return (lambda: rule_base.infer(X)), len(X)
+
+@case("tsk_infer", order=[0, 1], n_rules=[3, 10, 30])
+def tsk_case(order, n_rules):
+    rng = np.random.default_rng(4)
+    rules = [TSKRule(rule.anecedent_memberships, rng.normal(size=4)) for rule in make_rules(n_rules, 3)]
+    rule_base = TSKRuleBase(rules, order=order)
+    X = rng.uniform(0, 100, (10000, 3))
+    return (lambda: rule_base.infer(X)), len(X)
+
+def generator_memberships(dim):
+    anecedents = [TrapizoidalMembership(0, 10, [1, 3, 5, 7], x_step=10/(50 if dim < 3 else 25)) for _ in range(dim)]
+    return anecedents, TrapizoidalMembership(0, 10, [2, 4, 6, 8], x_step=0.1)
+
+@case("rule_generator_init", dim=[1, 2, 3])
+def rule_generator_init_case(dim):
+    anecedents, consequent = generator_memberships(dim)
+    return (lambda: RuleGenerator(anecedents, consequent)), 1
+
+@case("rule_generator_evaluate", dim=[1, 2, 3])
+def rule_generator_evaluate_case(dim):
+    anecedents, consequent = generator_memberships(dim)
+    generator = RuleGenerator(anecedents, consequent)
+    primes = [TrapizoidalMembership(0, 10, [2, 3, 4, 5], x_step=0.1) for _ in range(dim)]
+    return (lambda: generator.evaluate(primes)), 1
+
+@case("wall_distances", n_rays=[3, 16, 64])
+def wall_distances_case(n_rays):
+    from simulation import Car
+    car = Car(3, 4)
+    if n_rays == 3:
+        return (lambda: car.getWallDistances()), 1
+    return (lambda: car.wall_distance_fan(n_rays)), 1
+
+@case("batch_step", n_cars=[10, 100, 1000])
+def batch_step_case(n_cars):
+    from simulation import BatchSimulation
+    sim = BatchSimulation(n_cars)
+    actions = np.zeros((n_cars, 2))
+    actions[:, 1] = 1
+    def run():
+        sim.wall_distances()
+        sim.step(actions)
+    return run, n_cars
+
+@case("ea_generation", pop_size=[100, 1000, 10000], cross=["two_point", "undx"])
+def ea_generation_case(pop_size, cross):
+    import ea
+    np.random.seed(0)
+    run = ea.Run(pop_size, True, 0.05, 10, 10**9, ea.rastrigin, 0, 0, 0, {"two_point": 0, "undx": 1}[cross], 0, 0,
+                 store_points=False, stats_every=None)
+    return run.step, pop_size
+
+#Best seconds per call out of repeat runs, each run loops for at least min_time
+def time_call(function, repeat, min_time) -> float:
+    function()
+    best = float("inf")
+    for _ in range(repeat):
+        n = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / n)
+    return best
+
+def peak_memory(function) -> int:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def case_key(name, size) -> str:
+    return name + "[" + ",".join(f"{key}={value}" for key, value in size.items()) + "]"
+
+def run_benchmarks(quick = False, name_filter = None, repeat = 3, min_time = 0.2) -> dict:
+    results = {}
+    for name, sizes, setup in CASES:
+        if name_filter is not None and name_filter not in name:
+            continue
+        keys = list(sizes)
+        values = [sizes[key][:1] if quick else sizes[key] for key in keys]
+        for combination in itertools.product(*values):
+            size = dict(zip(keys, combination))
+            function, items = setup(**size)
+            seconds = time_call(function, repeat, min_time)
+            key = case_key(name, size)
+            results[key] = {"case": name, "size": size, "seconds": seconds, "throughput": items / seconds, "peak_bytes": peak_memory(function)}
+            print(f"{key:55s} {seconds*1e3:12.4f} ms {items/seconds:14.1f} /s {results[key]['peak_bytes']/1e6:10.3f} MB")
+    return results
+
+#Cases more than tolerance slower than the baseline, as (key, baseline seconds, seconds)
+def compare(results: dict, baseline: dict, tolerance = 0.25) -> list:
+    regressions = []
+    for key, result in results.items():
+        if key in baseline and result["seconds"] > baseline[key]["seconds"] * (1 + tolerance):
+            regressions.append((key, baseline[key]["seconds"], result["seconds"]))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fuzzy inference and EA hot paths")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown over the baseline that counts as a regression")
+    parser.add_argument("--filter", help="only run cases with this in their name")
+    parser.add_argument("--quick", action="store_true", help="only the smallest size of each case")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.quick, args.filter, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before*1e3:.4f} ms -> {after*1e3:.4f} ms ({after/before:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
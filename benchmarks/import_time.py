@@ -0,0 +1,65 @@
+#Cold start import times of the headless fuzzy modules, each measured in a fresh interpreter
+#Fails (exit 1) when a module takes longer than the budget on top of numpy, or pulls in a module only plotting or the game needs
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --budget 50 --output import_times.json
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#modules a scoring worker imports
+MODULES = ["fuzzy.memberships", "fuzzy.norms", "fuzzy.fis", "fuzzy.zadeh_fis", "fuzzy.lookup", "fuzzy.serialization"]
+
+#heavy modules none of them should import
+FORBIDDEN = ["matplotlib", "pygame", "IPython"]
+
+#imports numpy first so its time is reported on its own, prints (numpy seconds, module seconds, forbidden modules loaded)
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import numpy
+numpy_done = time.perf_counter()
+import {module}
+done = time.perf_counter()
+print(json.dumps([numpy_done - start, done - numpy_done, [name for name in {forbidden} if name in sys.modules]]))
+"""
+
+def measure(module: str) -> (float, float, list):
+    code = CHILD.format(module=module, forbidden=FORBIDDEN)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+#Best of repeat fresh interpreters for every module, {module: {numpy_ms, import_ms, forbidden}}
+def import_times(modules = MODULES, repeat = 5) -> dict:
+    results = {}
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        results[module] = {"numpy_ms": min(run[0] for run in runs) * 1e3, "import_ms": min(run[1] for run in runs) * 1e3,
+                           "forbidden": sorted(set(name for run in runs for name in run[2]))}
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the cold start import time of the fuzzy modules")
+    parser.add_argument("--budget", type=float, default=100.0, help="milliseconds a module may take to import on top of numpy")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="save the results as JSON")
+    args = parser.parse_args()
+
+    results = import_times(repeat=args.repeat)
+    failed = False
+    for module, result in results.items():
+        over = result["import_ms"] > args.budget
+        failed |= over or bool(result["forbidden"])
+        print(f"{module:25s} numpy {result['numpy_ms']:8.1f} ms   module {result['import_ms']:8.1f} ms"
+              + ("   OVER BUDGET" if over else "") + (f"   imports {', '.join(result['forbidden'])}" if result["forbidden"] else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "budget_ms": args.budget, "results": results}, f, indent=2)
+
+    if failed:
+        sys.exit(1)
+    print(f"every module imports within {args.budget:g} ms of numpy")
@@ -0,0 +1,13 @@
+import importlib
+
+#The evolutionary algorithm from ea.ipynb, importable as a package (from evolution import ea) or as flat modules from inside evolution/
+#Importing the package loads nothing, every submodule is imported the first time it's used
+SUBMODULES = ["ea", "islands", "objectives", "plots", "telemetry"]
+
+def __getattr__(name: str):
+    if name in SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+def __dir__():
+    return sorted(list(globals()) + SUBMODULES)
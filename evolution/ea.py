@@ -0,0 +1,363 @@
+#Evolutionary algorithm from ea.ipynb as an importable module
+#The population is one (pop_size, n_dim) array and every operator works on all of it at once
+#Fitness functions take a (pop_size, n_dim) array and return a (pop_size,) array, lower is better
+from math import exp, sqrt, ceil, floor
+import numpy as np
+#relative when imported as the evolution package, bare when run from inside evolution/
+if __package__:
+    from .telemetry import StreamingStats
+    #Test Functions, see objectives.py
+    from .objectives import rastrigin, rosenbrock, styblinski, sphere, ackley, griewank, schwefel, OBJECTIVES
+else:
+    from telemetry import StreamingStats
+    from objectives import rastrigin, rosenbrock, styblinski, sphere, ackley, griewank, schwefel, OBJECTIVES
+rosenbrock_function = rosenbrock
+
+#Wraps a function of one chromosome so it can be used as a fitness function, for objectives that can't be vectorized
+def batched(function):
+    return lambda pop : np.array([function(chromosome) for chromosome in pop], dtype=float)
+
+#Initiation Functions - Both functions return a (pop_size, n) population
+#Make the population size even (it makes it easier down the line)
+
+#Uniform Random Initialization
+def uniform_random_init(pop_size:int, n:int, params:list) -> np.ndarray:
+    x_i_min = params[0]
+    x_i_max = params[1]
+    return np.random.rand(pop_size, n) * (x_i_max-x_i_min) + x_i_min
+
+#Normal Distribution Initialization
+def normal_distribution_init(pop_size:int, n:int, params:list) -> np.ndarray:
+    mean = params[0]
+    stddev = params[1]
+    return np.random.normal(loc=mean, scale=stddev, size=(pop_size, n))
+
+#Selection Functions - Both functions return an array of indexes into the population that will be used for sexual crossover
+#fitness is the (pop_size,) array of fitness function values, so the population is only scored once a generation
+#Both functions support elitism, the best is always the first index
+
+#Indexes kept as they are when high_pc is set, random distinct ones other than the best, enough to fill half the population
+def high_pc_selection(pop_size:int, best_idx:int, n_selected:int) -> np.ndarray:
+    others = np.delete(np.arange(pop_size), best_idx)
+    return np.random.permutation(others)[:max(ceil(pop_size/2) - n_selected, 0)]
+
+#Tournament Selection
+def tournament_selection(fitness:np.ndarray, t:int, params:list, elitism = True, high_pc = False) -> np.ndarray:
+    n = params[0]
+    n_ts = params[1]
+    best_idx = int(np.argmin(fitness))
+
+    selection_pop = [np.array([best_idx])] if elitism else []
+    if high_pc:
+        selection_pop.append(high_pc_selection(len(fitness), best_idx, len(selection_pop)))
+    n_selected = sum(len(selected) for selected in selection_pop)
+
+    #Tournament selection process, one row per tournament, the fittest participant of each row wins
+    tournament_pop = np.random.randint(len(fitness), size=(max(n - n_selected, 0), n_ts))
+    selection_pop.append(tournament_pop[np.arange(len(tournament_pop)), np.argmin(fitness[tournament_pop], axis=1)])
+
+    return np.concatenate(selection_pop)
+
+#Boltzmann Selection
+def boltzmann_selection(fitness:np.ndarray, t:int, params:list, elitism = True, high_pc = False) -> np.ndarray:
+    n = params[0]
+    T_func = params[1]
+    correction_factor = 10**35
+    best_idx = int(np.argmin(fitness))
+
+    selection_pop = [np.array([best_idx])] if elitism else []
+    if high_pc:
+        selection_pop.append(high_pc_selection(len(fitness), best_idx, len(selection_pop)))
+    n_selected = sum(len(selected) for selected in selection_pop)
+
+    #Boltzmann distribution, shifted by its max before exp so it can't overflow
+    T = T_func(t)
+    weights = -(np.asarray(fitness, dtype=float)/correction_factor)/T
+    weights = np.exp(weights - np.max(weights))
+    selection_pop.append(np.random.choice(len(fitness), size=max(ceil(len(fitness)/2) - n_selected, 0), p=weights/np.sum(weights)))
+
+    return np.concatenate(selection_pop)
+
+#Crossover Operators - given the general population and the selection population from the selection functions, return n_children children
+
+#Two Point - choose two parents randomly for each pair of children, swap the genes between two points
+def two_point_cross(pop:np.ndarray, selection_pop:np.ndarray, n_dim:int, params=None, n_children = 2) -> np.ndarray:
+    n_pairs = ceil(n_children/2)
+    parent_1 = pop[selection_pop[np.random.randint(low=0, high=len(selection_pop), size=n_pairs)]]
+    parent_2 = pop[selection_pop[np.random.randint(low=0, high=len(selection_pop), size=n_pairs)]]
+    point_1 = np.random.randint(low=0, high=n_dim, size=n_pairs)
+    point_2 = np.random.randint(low=0, high=n_dim, size=n_pairs)
+
+    #genes from the smaller point up to and including the larger one are swapped
+    genes = np.arange(n_dim)
+    swap = (genes >= np.minimum(point_1, point_2)[:, None]) & (genes <= np.maximum(point_1, point_2)[:, None])
+
+    child_1 = np.where(swap, parent_2, parent_1)
+    child_2 = np.where(swap, parent_1, parent_2)
+
+    return np.stack([child_1, child_2], axis=1).reshape(-1, n_dim)[:n_children]
+
+#n rows of 3 different positions in selection_pop
+def sample_parents(selection_pop:np.ndarray, n:int) -> np.ndarray:
+    parents = np.random.randint(len(selection_pop), size=(n, 3))
+    same = (parents[:, 0] == parents[:, 1]) | (parents[:, 0] == parents[:, 2]) | (parents[:, 1] == parents[:, 2])
+    while np.any(same):
+        parents[same] = np.random.randint(len(selection_pop), size=(np.count_nonzero(same), 3))
+        same = (parents[:, 0] == parents[:, 1]) | (parents[:, 0] == parents[:, 2]) | (parents[:, 1] == parents[:, 2])
+    return selection_pop[parents]
+
+#UNDX - choose 3 parents randomly, m children from each set of parents
+def undx_cross(pop:np.ndarray, selection_pop:np.ndarray, n_dim:int, params:list, n_children = None) -> np.ndarray:
+    m = params[0]
+    sigma_1 = params[1]
+    sigma_2 = params[2]
+    if n_children is None:
+        n_children = m
+    n_groups = ceil(n_children/m)
+
+    parents = sample_parents(selection_pop, n_groups)
+    parent_1, parent_2, parent_3 = pop[parents[:, 0]], pop[parents[:, 1]], pop[parents[:, 2]]
+
+    #find midpoint of the first two parents, the vector between 1 and 2 and the vector between 1 and 3
+    midpoint = (parent_1 + parent_2)/2
+    v_12 = parent_2 - parent_1
+    v_13 = parent_3 - parent_1
+
+    #Get the difference vector (from parent 2 to parent 1)
+    v_diff = -1.0 * v_12
+
+    #Find distance from 3rd parent to primary search line
+    e_12 = v_12 / np.clip(np.linalg.norm(v_12, ord=2, axis=1), 1e-10, None)[:, None]
+    v_12_3 = v_13 - np.sum(v_13 * e_12, axis=1)[:, None] * e_12 #Vector orthogonal to search line through 3
+    distance = np.linalg.norm(v_12_3, ord=2, axis=1)
+
+    #Find orthogonal basis vector for the subspace that are orthogonal to the search line, one QR for every set of parents
+    basis_matrix = np.broadcast_to(np.identity(n_dim), (n_groups, n_dim, n_dim)).copy()
+    nonzero = np.any(e_12 != 0, axis=1)
+    basis_matrix[nonzero, 0] = e_12[nonzero]
+
+    Q, _ = np.linalg.qr(np.swapaxes(basis_matrix, 1, 2))
+    basis_vectors = np.swapaxes(Q, 1, 2)[:, 1:]
+
+    #create children, (n_groups, m, n_dim)
+    norm_1 = np.random.normal(0, sigma_1, size=(n_groups, m, 1))
+    norm_2 = np.random.normal(0, sigma_2, size=(n_groups, m, n_dim - 1))
+
+    children = midpoint[:, None] + norm_1 * v_diff[:, None]
+    children += distance[:, None, None] * (norm_2 @ basis_vectors)
+
+    return children.reshape(-1, n_dim)[:n_children]
+
+#Main Crossover Function - Returns the new population (size len(pop)) after selection
+def crossover(function, elitism:bool, pop:np.ndarray, selection_pop:np.ndarray, n_dim:int, params:list, high_pc = False) -> np.ndarray:
+    kept = []
+    if(elitism):
+        kept.append(selection_pop[:1])
+
+    if high_pc:
+        kept.append(selection_pop[1:floor(len(pop)/2)])
+
+    kept = np.concatenate(kept) if kept else np.zeros(0, dtype=int)
+    children = function(pop, selection_pop, n_dim, params, n_children=len(pop) - len(kept))
+
+    return np.concatenate([pop[kept], children])
+
+#Mutation Operators - given the population (or part of it), return a mutated copy
+
+#Normal Distributon Pertution Mutation
+def normal_dis_mutation(pop:np.ndarray, mutate_chance:float, params:list) -> np.ndarray:
+    sigma = params[0]
+    mutate = np.random.uniform(0, 1, size=pop.shape) <= mutate_chance
+    return pop + mutate * np.random.normal(0, sigma, size=pop.shape)
+
+#Swap Mutation, genes are visited in order so a gene can be swapped more than once like the per chromosome version
+def swap_mutation(pop:np.ndarray, mutate_chance:float, params=None) -> np.ndarray:
+    pop = pop.copy()
+    rows = np.arange(len(pop))
+    for gene_idx in range(pop.shape[1]):
+        mutate = np.random.uniform(0, 1, size=len(pop)) <= mutate_chance
+        swap_idx = np.random.randint(0, high=pop.shape[1], size=len(pop))
+        swapping = rows[mutate]
+        swap_idx = swap_idx[mutate]
+        temp = pop[swapping, gene_idx].copy()
+        pop[swapping, gene_idx] = pop[swapping, swap_idx]
+        pop[swapping, swap_idx] = temp
+    return pop
+
+#Main Mutation Function - returns the new generation, the elite and the high_pc half are left alone
+def mutate(function, elitism:bool, crossover_pop:np.ndarray, mutate_chance, params:list, high_pc = False) -> np.ndarray:
+    n_kept = floor(len(crossover_pop)/2) if high_pc else int(elitism)
+    return np.concatenate([crossover_pop[:n_kept], function(crossover_pop[n_kept:], mutate_chance, params)])
+
+#Termination criteria - used in the loop to determine how it ends
+#Returns true if the termination condition meets
+
+#Max Amount of Generations Termination
+def enough_time_termination(t_current:int, t_max:int):
+    return t_current>=t_max
+
+#Slow Changing Max Termination, keeps its state so every run needs its own
+class SlowChangingMaxTermination:
+    def __init__(self, t_max = 100):
+        self.t_max = t_max
+        self.t_since_change = 0
+        self.starting_max = 0.0
+
+    def __call__(self, fit_max:float) -> bool:
+        if(fit_max == self.starting_max):
+            self.t_since_change += 1
+            return self.t_since_change > self.t_max
+        else:
+            self.starting_max = fit_max
+            self.t_since_change = 0
+            return False
+
+#Defining parameters for each function/operator
+init_func = [[uniform_random_init, [-5.12, 5.12]], [normal_distribution_init, [0,2]]]
+selection_func = [[tournament_selection, [200*100, 3]], [boltzmann_selection, [200*100, lambda t : 1000*exp(-t/100)]]]
+crossover_func = [[two_point_cross, None], [undx_cross, [3, 0.5, 0.35/sqrt(2)]]]
+mutation_func = [[normal_dis_mutation, [10.24/12]], [swap_mutation, None]]
+
+#Scores (higher is better) of fitness function values
+def fitness_scores(fitness:np.ndarray, fitness_min) -> np.ndarray:
+    return 1.0 / (fitness - fitness_min + 1)
+
+#Find the fitness for a whole population, sorted by the score function
+def fitness_pop(pop:np.ndarray, fitness_function, fitness_min):
+    scores = fitness_scores(fitness_function(pop), fitness_min)
+    inds = np.argsort(scores)[::-1]
+    return scores[inds], pop[inds]
+
+#One run of the EA, everything generations() needs between generations (termination state included)
+#Operators are given as indexes into the tables above so a run can be pickled and sent to another process
+#store_points - keep the sorted population of every generation in memory for the contour animation
+#stats_every - keep the stats of every k-th generation (None for none), running stats are always kept
+#callbacks - called as callback(run, population, scores) with the population sorted best first, for the initial population and after every generation
+class Run:
+    def __init__(self, sz, elitism, mutation_rate, n_dim, n_gen_max, fitness_func, fitness_min, init, selection, cross, mutation, terminate, high_pc = False,
+                 store_points = True, stats_every = 1, callbacks = ()):
+        self.elitism = elitism
+        self.mutation_rate = mutation_rate
+        self.n_dim = n_dim
+        self.n_gen_max = n_gen_max
+        self.fitness_func = fitness_func
+        self.fitness_min = fitness_min
+        self.selection = selection
+        self.cross = cross
+        self.mutation = mutation
+        self.terminate = terminate
+        self.high_pc = high_pc
+        self.store_points = store_points
+        self.callbacks = list(callbacks)
+        self.termination = SlowChangingMaxTermination()
+        self.stats = StreamingStats(stats_every)
+        self.finished = False
+        # this is the number of generations
+        self.current_generation = 0
+
+        #Get initial population, fitness is kept so every generation is only scored once
+        self.population = init_func[init][0](sz,n_dim,init_func[init][1])
+        self.fitness = fitness_func(self.population)
+        #Store the points from generation to generation
+        self.stored_points = []
+        self.record(fitness_scores(self.fitness, fitness_min))
+
+    #Checks the termination condition once a generation, once it is met the run stays finished
+    def done(self) -> bool:
+        if not self.finished:
+            self.finished = not (((self.terminate==0 and not enough_time_termination(self.current_generation, 1000))  #Termination Condition 1
+                                  or (self.terminate==1 and not self.termination(self.stats.last_max)))             #Termination Condition 2
+                                 and (self.current_generation < self.n_gen_max))                                    #This is taking too long
+        return self.finished
+
+    def step(self):
+        # select
+        pop_sel = selection_func[self.selection][0](self.fitness, self.current_generation, selection_func[self.selection][1], self.elitism, self.high_pc)
+        # crossover
+        pop_after_cross = crossover(crossover_func[self.cross][0], self.elitism, self.population, pop_sel, self.n_dim, crossover_func[self.cross][1], self.high_pc)
+        # mutation
+        self.population = mutate(mutation_func[self.mutation][0], self.elitism, pop_after_cross, self.mutation_rate, mutation_func[self.mutation][1], self.high_pc)
+        # evaluate
+        self.fitness = self.fitness_func(self.population)
+        self.current_generation += 1
+
+        scores = fitness_scores(self.fitness, self.fitness_min)
+        inds = np.argsort(scores)[::-1]
+        self.stats.update(self.current_generation, self.population[inds], scores[inds])
+        self.record(scores, inds)
+
+    #Hands the sorted population to store_points and the callbacks
+    def record(self, scores:np.ndarray, inds = None):
+        if not self.store_points and not self.callbacks:
+            return
+        if inds is None:
+            inds = np.argsort(scores, kind="stable")[::-1]
+        population, scores = self.population[inds], scores[inds]
+        if self.store_points:
+            self.stored_points.append(population) # remember each epoch
+        for callback in self.callbacks:
+            callback(self, population, scores)
+
+    #Stats of the kept generations, the same arrays generations() used to return
+    @property
+    def stats_min(self) -> np.ndarray:
+        return self.stats.history()[:, 0]
+
+    @property
+    def stats_avg(self) -> np.ndarray:
+        return self.stats.history()[:, 1]
+
+    @property
+    def stats_max(self) -> np.ndarray:
+        return self.stats.history()[:, 2]
+
+    @property
+    def stats_std(self) -> np.ndarray:
+        return self.stats.history()[:, 3]
+
+    #Generation of every row of the stats
+    @property
+    def stats_generations(self) -> list:
+        return self.stats.generations
+
+    @property
+    def best_chromo(self) -> list:
+        return self.stats.best_chromos
+
+    @property
+    def best_score(self) -> list:
+        return self.stats.history()[:, 2].tolist()
+
+    #Runs until the termination condition is met, or for at most n_gen more generations
+    def evolve(self, n_gen = None):
+        for _ in range(self.n_gen_max if n_gen is None else n_gen):
+            if self.done():
+                break
+            self.step()
+        return self
+
+    #The n best (lowest fitness) individuals and their fitness
+    def best(self, n = 1) -> (np.ndarray, np.ndarray):
+        inds = np.argsort(self.fitness, kind="stable")[:n]
+        return self.population[inds], self.fitness[inds]
+
+    #Replaces the worst individuals with the migrants
+    def receive(self, migrants:np.ndarray, migrant_fitness:np.ndarray):
+        n = min(len(migrants), len(self.population) - 1)
+        worst = np.argsort(self.fitness, kind="stable")[len(self.population)-n:]
+        self.population = self.population.copy()
+        self.fitness = self.fitness.copy()
+        self.population[worst] = migrants[:n]
+        self.fitness[worst] = migrant_fitness[:n]
+
+#Main Program Loop
+#trajectory - a telemetry.TrajectoryStore to record the populations in instead of keeping them all in memory, it's returned as stored_points
+def generations(sz, elitism, mutation_rate, n_dim, n_gen_max, fitness_func, fitness_min, init, selection, cross, mutation, terminate, high_pc = False,
+                stats_every = 1, trajectory = None, callbacks = ()):
+    callbacks = list(callbacks) + ([trajectory] if trajectory is not None else [])
+    run = Run(sz, elitism, mutation_rate, n_dim, n_gen_max, fitness_func, fitness_min, init, selection, cross, mutation, terminate, high_pc,
+              store_points=trajectory is None, stats_every=stats_every, callbacks=callbacks).evolve()
+    if trajectory is not None:
+        trajectory.flush()
+    stored_points = run.stored_points if trajectory is None else trajectory
+    return run.best_chromo,run.best_score,run.stats_min,run.stats_avg,run.stats_max,run.stats_std,stored_points, run.current_generation
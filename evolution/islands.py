@@ -0,0 +1,72 @@
+#Island model - several ea.Run populations evolve in their own processes and trade their best individuals every few generations
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+if __package__:
+    from . import ea
+else:
+    import ea
+
+#Settings an island uses when its config leaves them out, operators are indexes into the tables in ea.py
+DEFAULT_ISLAND = {"sz": 100, "elitism": True, "mutation_rate": 0.05, "init": 0, "selection": 0, "cross": 1, "mutation": 0, "terminate": 1, "high_pc": False}
+
+#Who sends migrants to who, a list of (from island, to island)
+#topology - "ring" (to the next island), "full" (to every other island), "random" (to one random other island, picked again every migration),
+#"none", or the list of edges itself
+def migration_edges(topology, n_islands:int, rng) -> list:
+    if not isinstance(topology, str):
+        return list(topology)
+    if topology == "ring":
+        return [(i, (i+1) % n_islands) for i in range(n_islands)] if n_islands > 1 else []
+    if topology == "full":
+        return [(i, j) for i in range(n_islands) for j in range(n_islands) if i != j]
+    if topology == "random":
+        if n_islands < 2:
+            return []
+        targets = (np.arange(n_islands) + rng.integers(1, n_islands, size=n_islands)) % n_islands
+        return [(i, int(j)) for i, j in enumerate(targets)]
+    if topology == "none":
+        return []
+    raise ValueError(f"Unknown topology {topology}, use ring, full, random, none or a list of edges")
+
+#Sends every island's n_migrants best along the edges, every island's emigrants are picked before any of them arrive
+def migrate(runs:[ea.Run], edges:list, n_migrants:int):
+    emigrants = [run.best(n_migrants) for run in runs]
+    for dst in range(len(runs)):
+        sources = [src for src, to in edges if to == dst]
+        if sources:
+            runs[dst].receive(np.concatenate([emigrants[src][0] for src in sources]),
+                              np.concatenate([emigrants[src][1] for src in sources]))
+
+#Runs in the worker, seeded so islands don't share the random state the processes were forked with
+def evolve_island(run:ea.Run, n_gen:int, seed:int) -> ea.Run:
+    np.random.seed(seed)
+    return run.evolve(n_gen)
+
+#Evolves one population per config in islands for up to n_gen_max generations, migrating every interval generations
+#islands - list of dicts overriding DEFAULT_ISLAND, fitness_func has to be picklable (a module level function or an Objective)
+#n_workers - processes to use, None is one per core and 1 runs every island in this process
+#Returns (best chromosome, its fitness, the runs) - every run has the same stats generations() returns
+def island_generations(islands:[dict], n_dim:int, n_gen_max:int, fitness_func, fitness_min, topology = "ring", interval = 10, n_migrants = 2, n_workers = None, seed = None):
+    rng = np.random.default_rng(seed)
+
+    runs = []
+    for config in islands:
+        np.random.seed(rng.integers(2**32))
+        runs.append(ea.Run(n_dim=n_dim, n_gen_max=n_gen_max, fitness_func=fitness_func, fitness_min=fitness_min, store_points=False, **{**DEFAULT_ISLAND, **config}))
+
+    pool = ProcessPoolExecutor(max_workers=n_workers) if n_workers != 1 else None
+    try:
+        while not all(run.finished for run in runs):
+            seeds = rng.integers(2**32, size=len(runs))
+            if pool is None:
+                runs = [evolve_island(run, interval, s) for run, s in zip(runs, seeds)]
+            else:
+                runs = list(pool.map(evolve_island, runs, [interval] * len(runs), seeds))
+            migrate(runs, migration_edges(topology, len(runs), rng), n_migrants)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    best = [run.best() for run in runs]
+    island = int(np.argmin([fitness[0] for _, fitness in best]))
+    return best[island][0][0], float(best[island][1][0]), runs
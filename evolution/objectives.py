@@ -0,0 +1,74 @@
+#Benchmark objectives, every function takes a (batch, n_dim) array (or one chromosome) and returns a (batch,) array
+#x_i is along the last axis so one implementation is used for optimization and for contour plots
+import numpy as np
+
+def sphere_function(x):
+    x = np.asarray(x, dtype=float)
+    return np.sum(x*x, axis=-1)
+
+def rastrigin_function(x):
+    x = np.asarray(x, dtype=float)
+    return 10*x.shape[-1] + np.sum(x*x - 10*np.cos(2*np.pi*x), axis=-1)
+
+def rosenbrock_function(x):
+    x = np.asarray(x, dtype=float)
+    return np.sum(100 * (x[..., 1:] - x[..., :-1] ** 2) ** 2 + (x[..., :-1] - 1) ** 2, axis=-1)
+
+def styblinski_function(x):
+    x = np.asarray(x, dtype=float)
+    x_2 = x*x
+    return 0.5*np.sum(x_2*x_2 - 16*x_2 + 5*x, axis=-1)
+
+def ackley_function(x, a = 20.0, b = 0.2, c = 2*np.pi):
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    return -a*np.exp(-b*np.sqrt(np.sum(x*x, axis=-1)/n)) - np.exp(np.sum(np.cos(c*x), axis=-1)/n) + a + np.e
+
+def griewank_function(x):
+    x = np.asarray(x, dtype=float)
+    i = np.arange(1, x.shape[-1] + 1)
+    return 1 + np.sum(x*x, axis=-1)/4000 - np.prod(np.cos(x/np.sqrt(i)), axis=-1)
+
+def schwefel_function(x):
+    x = np.asarray(x, dtype=float)
+    return 418.9828872724338*x.shape[-1] - np.sum(x*np.sin(np.sqrt(np.abs(x))), axis=-1)
+
+#An objective with its search bounds (the same for every x_i) and where its global minimum is
+#optimum_x - the value every x_i has at the global minimum
+class Objective:
+    def __init__(self, name: str, function, bounds: (float, float), optimum_x: float):
+        self.name = name
+        self.function = function
+        self.bounds = bounds
+        self.optimum_x = optimum_x
+
+    def __call__(self, x) -> np.ndarray:
+        return self.function(x)
+
+    def optimum(self, n_dim: int) -> np.ndarray:
+        return np.full(n_dim, self.optimum_x, dtype=float)
+
+    #The global minimum for n_dim dimensions, used as fitness_min
+    def minimum(self, n_dim: int) -> float:
+        return float(self.function(self.optimum(n_dim)))
+
+    #Values on a square grid over the bounds (or over the given ones), returns x, y and z for contour plots
+    def grid(self, step = 0.05, bounds = None):
+        x_min, x_max = self.bounds if bounds is None else bounds
+        a = np.arange(x_min, x_max + step/2, step)
+        x, y = np.meshgrid(a, a)
+        z = self.function(np.stack([x, y], axis=-1))
+        return x, y, z
+
+    def __repr__(self):
+        return f"Objective({self.name}, bounds={self.bounds})"
+
+sphere = Objective("sphere", sphere_function, (-5.12, 5.12), 0.0)
+rastrigin = Objective("rastrigin", rastrigin_function, (-5.12, 5.12), 0.0)
+rosenbrock = Objective("rosenbrock", rosenbrock_function, (-5.0, 10.0), 1.0)
+styblinski = Objective("styblinski", styblinski_function, (-5.0, 5.0), -2.903534027771177)
+ackley = Objective("ackley", ackley_function, (-32.768, 32.768), 0.0)
+griewank = Objective("griewank", griewank_function, (-600.0, 600.0), 0.0)
+schwefel = Objective("schwefel", schwefel_function, (-500.0, 500.0), 420.9687463599820)
+
+OBJECTIVES = {objective.name: objective for objective in [sphere, rastrigin, rosenbrock, styblinski, ackley, griewank, schwefel]}
@@ -0,0 +1,97 @@
+#Plots for the results of ea.generations, contours are drawn from the same objectives the EA optimizes
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+if __package__:
+    from .objectives import Objective
+else:
+    from objectives import Objective
+
+#stats_* are what ea.generations returns, with stats_every > 1 they only have a row for every k-th generation so the last row is the latest
+def print_stats(stats_min, stats_avg, stats_max, stats_std, executed_gen):
+    print(f"Number of generations: {executed_gen}")
+    if len(stats_min) == 0:
+        print("No stats were kept (stats_every=None)")
+        return
+    print(f"Min: {round(stats_min[-1],8)},")
+    print(f"Avg: {round(stats_avg[-1],8)}")
+    print(f"Max: {round(stats_max[-1],8)}")
+    print(f"Std Deviation: {round(stats_std[-1],8)}")
+
+#Generations the rows of ea.generations' stats belong to, every stats_every-th one starting from the first (none for stats_every=None)
+def kept_generations(n_rows: int, executed_gen: int, stats_every = 1) -> np.ndarray:
+    if stats_every is None:
+        return np.zeros(0, dtype=int)
+    return np.arange(stats_every, executed_gen + 1, stats_every)[:n_rows]
+
+#stats_every has to be the one ea.generations was run with, the x axis is the generation of each row
+def graph(stats_min, stats_avg, stats_max, executed_gen, title, stats_every = 1):
+    x = kept_generations(len(stats_min), executed_gen, stats_every)
+    if len(x) == 0:
+        print("No stats were kept (stats_every=None)")
+        return
+    plt.plot(x, stats_min[:len(x)],'r')
+    plt.plot(x, stats_avg[:len(x)],'b')
+    plt.plot(x, stats_max[:len(x)],'g')
+    plt.ylabel('Accuracy')
+    plt.xlabel('Generations')
+    plt.title(title)
+    plt.show()
+
+#graph from a telemetry.StreamingStats, x axis is the generations it kept
+def graph_stats(stats, title):
+    history = stats.history()
+    plt.plot(stats.generations, history[:, 0],'r')
+    plt.plot(stats.generations, history[:, 1],'b')
+    plt.plot(stats.generations, history[:, 2],'g')
+    plt.ylabel('Accuracy')
+    plt.xlabel('Generations')
+    plt.title(title)
+    plt.show()
+
+#Contour of the objective on a log scale, shifted by its minimum so functions with a negative minimum (styblinski) still show
+def plot_objective(objective: Objective, bounds = None, step = 0.05):
+    x, y, z = objective.grid(step, bounds)
+    plt.contour(x, y, z - objective.minimum(2), levels=np.logspace(-9, 9, 50), cmap='jet', alpha=0.4)
+    plt.xlim(x[0, 0], x[0, -1])
+    plt.ylim(y[0, 0], y[-1, 0])
+
+#Animates the population of every generation over the objective, stored_points can be a list or a telemetry.TrajectoryStore
+def contour(stored_points, objective: Objective, bounds = None):
+    from IPython import display
+
+    fig, ax = plt.subplots(nrows = 1, ncols = 1, figsize=(7, 5))
+    for data in stored_points:
+        plt.clf()
+        plt.scatter(data[:, 0], data[:, 1], edgecolor='b', alpha=0.3)
+        plot_objective(objective, bounds)
+
+        display.clear_output(wait=True)
+        display.display(plt.gcf())
+        time.sleep(0.01)
+
+def contour_one_gen(stored_points, objective: Objective, title, bounds = None):
+    fig, ax = plt.subplots(nrows = 1, ncols = 1, figsize=(7, 5))
+    stored_points = np.asarray(stored_points)
+
+    colors = np.random.rand(len(stored_points))
+    plt.scatter(stored_points[:, 0], stored_points[:, 1], c=colors, alpha=0.5)
+    plot_objective(objective, bounds)
+
+    plt.title(title)
+    plt.show()
+
+#Callback for ea.Run that redraws the current population over the objective every k-th generation, nothing is kept between frames
+def live_contour(objective: Objective, every = 10, bounds = None):
+    from IPython import display
+
+    def callback(run, population, scores):
+        if run.current_generation % every != 0:
+            return
+        plt.clf()
+        plt.scatter(population[:, 0], population[:, 1], edgecolor='b', alpha=0.3)
+        plot_objective(objective, bounds)
+        plt.title(f"Generation {run.current_generation}")
+        display.clear_output(wait=True)
+        display.display(plt.gcf())
+    return callback
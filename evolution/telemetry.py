@@ -0,0 +1,139 @@
+#Telemetry for ea.Run - statistics and trajectories that don't grow with population x generations in memory
+#Both are callbacks, called as callback(run, population, scores) after every generation with the population sorted best first
+import os
+import numpy as np
+
+#Per generation min/avg/max/std of the scores, kept for every k-th generation (or none when every is None)
+#and running (Welford) mean/std of every score the run has seen, with the best chromosome found so far
+class StreamingStats:
+    def __init__(self, every = 1):
+        self.every = every
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.best_score = -np.inf
+        self.best_chromo = None
+        self.last_min = self.last_avg = self.last_max = self.last_std = 0.0
+
+        self.generations = []
+        self.rows = [] #(min, avg, max, std) of the kept generations
+        self.best_chromos = []
+
+    def __call__(self, run, population:np.ndarray, scores:np.ndarray):
+        self.update(run.current_generation, population, scores)
+
+    def update(self, generation:int, population:np.ndarray, scores:np.ndarray):
+        self.last_min = float(np.min(scores))
+        self.last_max = float(np.max(scores))
+        self.last_avg = float(np.mean(scores))
+        self.last_std = float(np.std(scores))
+        if self.last_max > self.best_score:
+            self.best_score = self.last_max
+            self.best_chromo = population[np.argmax(scores)].copy()
+
+        #merge this generation into the running mean and sum of squared differences
+        n = len(scores)
+        delta = self.last_avg - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += self.last_std**2 * n + delta**2 * self.count * n / total
+        self.count = total
+
+        if self.every is not None and generation % self.every == 0:
+            self.generations.append(generation)
+            self.rows.append((self.last_min, self.last_avg, self.last_max, self.last_std))
+            self.best_chromos.append(population[np.argmax(scores)].copy())
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+    #(n_kept, 4) array of min, avg, max, std
+    def history(self) -> np.ndarray:
+        return np.array(self.rows, dtype=float).reshape(-1, 4)
+
+#Sorted populations written to chunked .npy files in path, only one chunk is ever held in memory
+#every - record every k-th generation, top_k - only record the k best individuals
+#Recorded generations are read back (memory mapped) with store[i], len(store) and iteration, so they work with plots.contour
+class TrajectoryStore:
+    def __init__(self, path, every = 1, top_k = None, chunk_size = 64):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.every = every
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+
+        self.generations = []
+        self.chunk_lengths = []
+        self.buffer_points = []
+        self.buffer_scores = []
+        self.open_chunk = (None, None, None)
+
+    def __call__(self, run, population:np.ndarray, scores:np.ndarray):
+        self.record(run.current_generation, population, scores)
+
+    def record(self, generation:int, population:np.ndarray, scores:np.ndarray):
+        if generation % self.every != 0:
+            return
+        k = len(population) if self.top_k is None else self.top_k
+        self.buffer_points.append(np.array(population[:k]))
+        self.buffer_scores.append(np.array(scores[:k]))
+        self.generations.append(generation)
+        if len(self.buffer_points) >= self.chunk_size:
+            self.flush()
+
+    def chunk_file(self, chunk:int, name:str) -> str:
+        return os.path.join(self.path, f"{name}_{chunk:05d}.npy")
+
+    #Writes out the buffered generations, call once the run is over so the store can be reopened with TrajectoryStore.open
+    def flush(self):
+        if self.buffer_points:
+            chunk = len(self.chunk_lengths)
+            np.save(self.chunk_file(chunk, "points"), np.stack(self.buffer_points))
+            np.save(self.chunk_file(chunk, "scores"), np.stack(self.buffer_scores))
+            self.chunk_lengths.append(len(self.buffer_points))
+            self.buffer_points = []
+            self.buffer_scores = []
+        np.save(os.path.join(self.path, "generations.npy"), np.array(self.generations, dtype=np.int64))
+
+    #Reopens a flushed store for reading
+    @staticmethod
+    def open(path):
+        store = TrajectoryStore(path)
+        store.generations = np.load(os.path.join(path, "generations.npy")).tolist()
+        while os.path.exists(store.chunk_file(len(store.chunk_lengths), "points")):
+            store.chunk_lengths.append(len(np.load(store.chunk_file(len(store.chunk_lengths), "points"), mmap_mode="r")))
+        return store
+
+    def __len__(self):
+        return len(self.generations)
+
+    #(chunk, index in chunk) of the i-th recorded generation, chunk is None if it's still in the buffer
+    def locate(self, i:int):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Generation {i} out of range for {len(self)} recorded generations")
+        for chunk, length in enumerate(self.chunk_lengths):
+            if i < length:
+                return chunk, i
+            i -= length
+        return None, i
+
+    def load(self, i:int, name:str) -> np.ndarray:
+        chunk, j = self.locate(i)
+        if chunk is None:
+            return (self.buffer_points if name == "points" else self.buffer_scores)[j]
+        if self.open_chunk[:2] != (chunk, name):
+            self.open_chunk = (chunk, name, np.load(self.chunk_file(chunk, name), mmap_mode="r"))
+        return self.open_chunk[2][j]
+
+    def __getitem__(self, i:int) -> np.ndarray:
+        return self.load(i, "points")
+
+    def scores(self, i:int) -> np.ndarray:
+        return self.load(i, "scores")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,14 @@
+import importlib
+
+#Fuzzy sets and inference, importable as a package (import fuzzy.fis, from fuzzy import fis) or as flat modules from inside fuzzy/
+#Importing the package loads nothing, every submodule is imported the first time it's used, so a worker that only runs rules
+#never pays for matplotlib (plotting imports it on demand) or pygame (only simulation and game need it)
+SUBMODULES = ["memberships", "norms", "fis", "zadeh_fis", "lookup", "serialization", "util", "instrument", "tuning", "simulation", "game"]
+
+def __getattr__(name: str):
+    if name in SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+def __dir__():
+    return sorted(list(globals()) + SUBMODULES)
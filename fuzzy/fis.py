@@ -1,37 +1,27 @@
-import memberships as member
-from memberships import Membership
-import util
 import numpy as np
+if __package__:
+    from . import memberships as member, norms
+    from .memberships import Membership
+else:
+    import memberships as member
+    import norms
+    from memberships import Membership
+
+#AND/OR Operators, the memberships of coor_value reduced with the matching norm from norms.py
+def anecedent_values(coor_value: [float], membership_functions: [Membership]) -> np.ndarray:
+    return np.array([membership_functions[i].interp(coor_value[i]) for i in range(len(coor_value))], dtype=float)
 
-#AND/OR Operators
 def zadeh_and(coor_value: [float], membership_functions: [Membership])->float:
-    min = 1.0
-    for i in range(len(coor_value)):
-        if min>membership_functions[i].interp(coor_value[i]):
-            min = membership_functions[i].interp(coor_value[i])
-    return min
+    return float(min(1.0, norms.zadeh_t_norm.reduce(anecedent_values(coor_value, membership_functions))))
 
 def product_and(coor_value: [float], membership_functions: [Membership])->float:
-    product = 1.0
-    for i in range(len(coor_value)):
-        product *= membership_functions[i].interp(coor_value[i])
-    return product
+    return float(norms.product_t_norm.reduce(anecedent_values(coor_value, membership_functions)))
 
 def zadeh_or(coor_value: [float], membership_functions: [Membership])->float:
-    max = 0.0
-    for i in range(len(coor_value)):
-        if max>membership_functions[i].interp(coor_value[i]):
-            max = membership_functions[i].interp(coor_value[i])
-    return max
+    return float(max(0.0, norms.zadeh_s_norm.reduce(anecedent_values(coor_value, membership_functions))))
 
 def product_or(coor_value: [float], membership_functions: [Membership])->float:
-    x = membership_functions[0].interp(coor_value[0])
-    y = membership_functions[1].interp(coor_value[1])
-    product = x + y -x*y
-    for i in range(2, len(coor_value)):
-        z = membership_functions[i].interp(coor_value[i])
-        product = product + z - product*z
-    return product
+    return float(norms.probabilistic_s_norm.reduce(anecedent_values(coor_value, membership_functions)))
 
 #Rule implementation
 class Rule:
@@ -40,64 +30,277 @@ class Rule:
         self.consequent = consequent_membership
 
     #Evaluate rule, returns the minimum membership of the anecedents
+    #and_op is one of the operators above, a norms.Norm or the name of a t-norm in norms.T_NORMS
     def evaluate(self, anecedent_input_values: [float], and_op = zadeh_and) -> (Membership, float):
+        and_op = norms.get_norm(and_op, norms.T_NORMS)
+        if isinstance(and_op, norms.Norm):
+            return float(and_op.reduce(anecedent_values(anecedent_input_values, self.anecedent_memberships)))
         return and_op(anecedent_input_values, self.anecedent_memberships)
 
     #Aggregate then takes the centroid of the aggregation
     #Aggregation Operators are from the Engelbrecht book
     #The rule in rules[] needs to have the corresponding index to its result from evaluate() in min_membership[]
     #Assume each rule has its consequent membership functions in the same domain
-    #have dx<0 if the consequent membership function is discrete
+    #have dx<0 if the consequent membership function is discrete, dx=None integrates exactly
+    #defuzz_op picks the Membership defuzzifier ("centroid", "bisector", "mean_of_maxima", "smallest_of_maxima", "largest_of_maxima")
+    #t_norm clips the consequents and s_norm combines the rules (Zadeh min/max by default, a norms.Norm or a name from norms.py)
+    #"root_sum_square" always scales instead of clipping and "sum" always adds (capped at 1)
     @staticmethod
-    def defuzzify(rules, min_memberships: [float], aggregation_op = "max_min", dx=0.01, step=0.01) -> (Membership, float):
-        if dx<0:
+    def defuzzify(rules, min_memberships: [float], aggregation_op = "max_min", dx=0.01, step=0.01, defuzz_op = "centroid",
+                  t_norm = "zadeh", s_norm = "zadeh") -> (Membership, float):
+        if dx is not None and dx<0:
             step = rules[0].consequent.x_step
 
-        match aggregation_op:
-            case "max_min":
-                max_membership_idx = util.max_array_idx(min_memberships)
-                return rules[max_membership_idx].consequent, rules[max_membership_idx].consequent.centroid(dx)
-            
-            case "averaging":
-                avg_membership = np.average(min_memberships)
-                avg_func = Membership(rules[0].consequent.x_min,rules[0].consequent.x_max,step, init_membership=False)
-
-                for i in range(len(rules)):
-                    for x in avg_func.get_input_range():
-                        n = avg_membership if rules[i].consequent.alpha_cut(avg_membership, x) else rules[i].consequent.interp(x)
-                        avg_func.set_membership_output(x, util.max([avg_func.interp(x), n]))
-
-                return avg_func, avg_func.centroid(dx)
-            
-            case "root_sum_square":
-                mem_func = Membership(rules[0].consequent.x_min,rules[0].consequent.x_max,step,init_membership=False)
-
-                for i in range(len(rules)):
-                    for x in mem_func.get_input_range():
-                        n = min_memberships[i] * rules[i].consequent.interp(x)
-                        mem_func.set_membership_output(x, util.max([mem_func.interp(x), n]))
-
-                return mem_func, mem_func.centroid(dx)
-
-            case "center_of_mass":
-                mem_func = Membership(rules[0].consequent.x_min,rules[0].consequent.x_max,step,init_membership=False)
-
-                for i in range(len(rules)):
-                    for x in mem_func.get_input_range():
-                        n = util.min([rules[i].consequent.interp(x), min_memberships[i]])
-                        mem_func.set_membership_output(x, util.max([mem_func.interp(x), n]))
-
-                return mem_func, mem_func.centroid(dx)
-            
-            case "sum":
-                mem_func = Membership(rules[0].consequent.x_min,rules[0].consequent.x_max,step,init_membership=False)
-
-                for i in range(len(rules)):
-                    for x in mem_func.get_input_range():
-                        n = mem_func.interp(x) + util.min([rules[i].consequent.interp(x), min_memberships[i]])
-                        mem_func.set_membership_output(x, util.min([1, util.max([mem_func.interp(x), n])]))
-
-                return mem_func, mem_func.centroid(dx)
-        
-        print(f"aggregation operation {aggregation_op} is invalid")
-        return None
+        if aggregation_op == "max_min":
+            max_membership_idx = int(np.argmax(min_memberships))
+            consequent = rules[max_membership_idx].consequent
+            return consequent, getattr(consequent, defuzz_op)(dx)
+
+        mem_func = Membership(rules[0].consequent.x_min,rules[0].consequent.x_max,step,init_membership=False)
+        consequents = np.stack([rule.consequent.interp_many(mem_func.get_input_range()) for rule in rules])
+        aggregated = aggregate(consequents, np.asarray(min_memberships, dtype=float)[None, :], aggregation_op, t_norm, s_norm)
+        if aggregated is None:
+            return None
+
+        mem_func.membership = aggregated[0]
+        return mem_func, getattr(mem_func, defuzz_op)(dx)
+
+#Aggregated output membership of every sample, consequents is (n_rules, n_y) and strengths is (N, n_rules), returns (N, n_y)
+def aggregate(consequents: np.ndarray, strengths: np.ndarray, aggregation_op: str, t_norm = "zadeh", s_norm = "zadeh") -> np.ndarray:
+    t_norm = norms.get_norm(t_norm, norms.T_NORMS)
+    s_norm = norms.get_norm(s_norm, norms.S_NORMS)
+
+    match aggregation_op:
+        case "averaging":
+            avg_membership = np.average(strengths, axis=1)
+            if t_norm is norms.zadeh_t_norm and s_norm is norms.zadeh_s_norm:
+                #min distributes over max, so the clip can go after the max and skip the (N, n_rules, n_y) array
+                return np.minimum(consequents.max(axis=0)[None, :], avg_membership[:, None])
+            return s_norm.reduce(t_norm(consequents[None], avg_membership[:, None, None]), axis=1)
+
+        case "root_sum_square":
+            return s_norm.reduce(strengths[:, :, None] * consequents[None], axis=1)
+
+        case "center_of_mass":
+            return s_norm.reduce(t_norm(consequents[None], strengths[:, :, None]), axis=1)
+
+        case "sum":
+            return np.minimum(1.0, t_norm(consequents[None], strengths[:, :, None]).sum(axis=1))
+
+    print(f"aggregation operation {aggregation_op} is invalid")
+    return None
+
+#Firing strength of every rule for every row of X, returns an (N, n_rules) array
+#reductions maps and_op's to their array equivalent, anything else falls back to calling rule.evaluate row by row
+def firing_strengths(rules: [Rule], input_idx: [np.ndarray], and_op, X, reductions: dict) -> np.ndarray:
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    strengths = np.zeros((X.shape[0], len(rules)))
+    reduction = and_op.reduce if isinstance(and_op, norms.Norm) else reductions.get(and_op)
+
+    for i, rule in enumerate(rules):
+        if reduction is None:
+            for n in range(X.shape[0]):
+                strengths[n, i] = rule.evaluate(X[n, input_idx[i]], and_op)
+            continue
+
+        mu = np.stack([membership.interp_many(X[:, input_idx[i][k]])
+                       for k, membership in enumerate(rule.anecedent_memberships)], axis=-1)
+        strengths[:, i] = reduction(mu)
+
+    return strengths
+
+#Compiled rule base, evaluates every rule on N samples at once instead of one sample at a time
+#input_idx[i] lists which columns of X feed the anecedents of rules[i] (defaults to columns 0..n-1)
+#The consequents are sampled once onto a shared grid, the same one Rule.defuzzify builds
+class RuleBase:
+    #and_op's that have an array equivalent, anything else falls back to calling and_op row by row
+    AND_REDUCTIONS = {
+        zadeh_and: lambda mu: np.minimum(1.0, norms.zadeh_t_norm.reduce(mu)),
+        product_and: norms.product_t_norm.reduce,
+        zadeh_or: lambda mu: np.maximum(0.0, norms.zadeh_s_norm.reduce(mu)),
+        product_or: norms.probabilistic_s_norm.reduce,
+    }
+
+    #and_op, t_norm and s_norm are the same as for Rule.evaluate and Rule.defuzzify, every norms.Norm has an array equivalent
+    def __init__(self, rules: [Rule], input_idx: [[int]] = None, and_op = zadeh_and, aggregation_op = "max_min", dx=0.01, step=0.01, batch_size=4096,
+                 t_norm = "zadeh", s_norm = "zadeh"):
+        self.rules = rules
+        self.and_op = norms.get_norm(and_op, norms.T_NORMS)
+        self.aggregation_op = aggregation_op
+        self.t_norm = norms.get_norm(t_norm, norms.T_NORMS)
+        self.s_norm = norms.get_norm(s_norm, norms.S_NORMS)
+        self.dx = dx
+        self.batch_size = batch_size
+
+        if input_idx is None:
+            input_idx = [list(range(len(rule.anecedent_memberships))) for rule in rules]
+        self.input_idx = [np.asarray(idx, dtype=int) for idx in input_idx]
+        self.n_inputs = max(int(idx.max()) for idx in self.input_idx) + 1
+
+        if dx is not None and dx<0:
+            step = rules[0].consequent.x_step
+
+        #dense consequent matrix, one row per rule
+        consequent = rules[0].consequent
+        self.y = Membership(consequent.x_min, consequent.x_max, step, init_membership=False).get_input_range()
+        self.consequents = np.stack([rule.consequent.interp_many(self.y) for rule in rules])
+
+        #centroid of each consequent on its own, used by max_min
+        self.consequent_centroids = np.array([rule.consequent.centroid(dx) for rule in rules])
+
+        #centroid weights, so the centroid of an aggregated membership is two dot products
+        if dx is None:
+            self.centroid_den, self.centroid_num = member.linear_weights(self.y, consequent.x_min, consequent.x_max)
+        elif dx <= 0:
+            self.centroid_num = self.y
+            self.centroid_den = np.ones(len(self.y))
+        else:
+            xs = np.arange(consequent.x_min, consequent.x_max, dx)
+            j = np.clip(np.searchsorted(self.y, xs, side="right") - 1, 0, len(self.y) - 2)
+            t = np.clip((xs - self.y[j])/(self.y[j+1] - self.y[j]), 0.0, 1.0)
+
+            #left riemann sum of the linear interpolation between grid points
+            self.centroid_num = np.zeros(len(self.y))
+            self.centroid_den = np.zeros(len(self.y))
+            np.add.at(self.centroid_num, j, xs*(1-t)*dx)
+            np.add.at(self.centroid_num, j+1, xs*t*dx)
+            np.add.at(self.centroid_den, j, (1-t)*dx)
+            np.add.at(self.centroid_den, j+1, t*dx)
+
+    #Firing strength of every rule for every sample, returns an (N, n_rules) array
+    def firing_strengths(self, X) -> np.ndarray:
+        return firing_strengths(self.rules, self.input_idx, self.and_op, X, self.AND_REDUCTIONS)
+
+    #Aggregated output membership for every sample, returns an (N, len(y)) array
+    def aggregate(self, strengths: np.ndarray) -> np.ndarray:
+        return aggregate(self.consequents, strengths, self.aggregation_op, self.t_norm, self.s_norm)
+
+    #Crisp output for every row of X (shape (N, n_inputs)), same as evaluate + defuzzify on each row
+    def infer(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        result = np.zeros(X.shape[0])
+
+        for start in range(0, X.shape[0], self.batch_size):
+            strengths = self.firing_strengths(X[start:start+self.batch_size])
+
+            if self.aggregation_op == "max_min":
+                result[start:start+self.batch_size] = self.consequent_centroids[np.argmax(strengths, axis=1)]
+                continue
+
+            aggregated = self.aggregate(strengths)
+            if aggregated is None:
+                return None
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[start:start+self.batch_size] = (aggregated @ self.centroid_num)/(aggregated @ self.centroid_den)
+
+        return result
+
+#Takagi-Sugeno-Kang rule, the consequent is a function of the inputs instead of a Membership so there is nothing to defuzzify
+#coefficients is [c_0, c_1, ..., c_n] for c_0 + c_1*x_1 + ... + c_n*x_n (first order) or just [c_0] (zero order)
+#the x's are every input of the rule base, not only the ones feeding this rule's anecedents
+class TSKRule(Rule):
+    def __init__(self, anecedent_membership: [Membership], coefficients: [float]):
+        super().__init__(anecedent_membership, None)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+
+    #Consequent value for inputs, one value for a single sample or one per row of an (N, n_inputs) array
+    def output(self, input_values) -> float:
+        input_values = np.asarray(input_values, dtype=float)
+        if len(self.coefficients) == 1:
+            return self.coefficients[0] if input_values.ndim < 2 else np.full(input_values.shape[0], self.coefficients[0])
+        return self.coefficients[0] + input_values @ self.coefficients[1:]
+
+    #Weighted average of the rules' outputs, the TSK counterpart of Rule.defuzzify
+    #min_memberships are the firing strengths from evaluate() in the same order as rules[], input_values feed output()
+    #returns nan when no rule fires
+    @staticmethod
+    def defuzzify(rules, min_memberships: [float], input_values: [float]) -> float:
+        weights = np.asarray(min_memberships, dtype=float)
+        outputs = np.array([rule.output(input_values) for rule in rules], dtype=float)
+        total = weights.sum()
+        return float(weights @ outputs / total) if total > 0 else float("nan")
+
+#Compiled TSK rule base, the output is sum(w_i * f_i(x))/sum(w_i) in closed form for N samples at once
+#input_idx and and_op are the same as for RuleBase, n_inputs defaults to the highest column input_idx uses, order is 0 (constant consequents) or 1 (linear consequents)
+#The consequent coefficients live in one (n_rules, n_inputs+1) matrix, or (n_rules, 1) for order 0, that fit() solves for
+class TSKRuleBase:
+    def __init__(self, rules: [TSKRule], input_idx: [[int]] = None, and_op = zadeh_and, n_inputs: int = None, order = 1, batch_size=4096):
+        self.rules = rules
+        self.and_op = norms.get_norm(and_op, norms.T_NORMS)
+        self.batch_size = batch_size
+
+        if input_idx is None:
+            input_idx = [list(range(len(rule.anecedent_memberships))) for rule in rules]
+        self.input_idx = [np.asarray(idx, dtype=int) for idx in input_idx]
+        if n_inputs is None:
+            n_inputs = max(int(idx.max()) for idx in self.input_idx) + 1
+        self.n_inputs = n_inputs
+
+        if order not in (0, 1):
+            raise ValueError(f"order {order} is invalid, use 0 or 1")
+        self.order = order
+
+        n_coefficients = 1 if order == 0 else n_inputs + 1
+        self.coefficients = np.zeros((len(rules), n_coefficients))
+        for i, rule in enumerate(rules):
+            self.coefficients[i, :len(rule.coefficients)] = rule.coefficients[:n_coefficients]
+
+    #Rule base with one zero-coefficient rule for every combination of anecedents
+    #memberships[k] lists the memberships of input k, so the rules cover a grid partition of the inputs
+    @staticmethod
+    def grid(memberships: [[Membership]], and_op = "product", order = 1) -> "TSKRuleBase":
+        combinations = np.stack(np.meshgrid(*[np.arange(len(m)) for m in memberships], indexing="ij"), axis=-1).reshape(-1, len(memberships))
+        rules = [TSKRule([memberships[k][j] for k, j in enumerate(combination)], np.zeros(1 if order == 0 else len(memberships) + 1))
+                 for combination in combinations]
+        return TSKRuleBase(rules, and_op=and_op, n_inputs=len(memberships), order=order)
+
+    #Firing strength of every rule for every sample, returns an (N, n_rules) array
+    def firing_strengths(self, X) -> np.ndarray:
+        return firing_strengths(self.rules, self.input_idx, self.and_op, X, RuleBase.AND_REDUCTIONS)
+
+    #Firing strengths divided by their sum, rows where no rule fires are all 0
+    def normalized_strengths(self, X) -> np.ndarray:
+        strengths = self.firing_strengths(X)
+        total = strengths.sum(axis=1, keepdims=True)
+        return norms.safe_divide(strengths, total, 0.0)
+
+    #[1, x_1, ..., x_n] for every row of X, just [1] for order 0
+    def regressors(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        ones = np.ones((X.shape[0], 1))
+        return ones if self.order == 0 else np.hstack([ones, X[:, :self.n_inputs]])
+
+    #Crisp output for every row of X (shape (N, n_inputs)), nan for rows where no rule fires
+    def infer(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        result = np.zeros(X.shape[0])
+
+        for start in range(0, X.shape[0], self.batch_size):
+            batch = X[start:start+self.batch_size]
+            strengths = self.firing_strengths(batch)
+            outputs = self.regressors(batch) @ self.coefficients.T
+            result[start:start+self.batch_size] = norms.safe_divide((strengths * outputs).sum(axis=1), strengths.sum(axis=1), np.nan)
+
+        return result
+
+    #Least squares fit of the consequent coefficients to targets y, the anecedents stay as they are
+    #the output is linear in the coefficients, so it's one lstsq over the (N, n_rules * n_coefficients) design matrix
+    #ridge > 0 adds ridge regularization for rules that barely fire, returns the root mean square error on X
+    def fit(self, X, y, ridge = 0.0) -> float:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        y = np.asarray(y, dtype=float)
+        design = (self.normalized_strengths(X)[:, :, None] * self.regressors(X)[:, None, :]).reshape(X.shape[0], -1)
+
+        if ridge > 0:
+            n = design.shape[1]
+            design = np.vstack([design, np.sqrt(ridge) * np.eye(n)])
+            y = np.concatenate([y, np.zeros(n)])
+        solution = np.linalg.lstsq(design, y, rcond=None)[0]
+
+        self.coefficients = solution.reshape(len(self.rules), -1)
+        for rule, coefficients in zip(self.rules, self.coefficients):
+            rule.coefficients = coefficients.copy()
+
+        residual = self.infer(X) - y[:X.shape[0]]
+        return float(np.sqrt(np.nanmean(residual**2)))
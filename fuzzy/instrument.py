@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import threading
+import functools
+import importlib
+
+#Opt-in timers and call counters for the fuzzy pipeline
+#enable() swaps the methods in TARGETS for timed wrappers and disable() puts the originals back, so nothing is paid while it's off
+#Times are inclusive, a stage that calls another instrumented stage includes that stage's time
+
+#Rule.defuzzify is split by aggregation op, it's a staticmethod so the op is the third argument
+def defuzzify_stage(args, kwargs) -> str:
+    return f"Rule.defuzzify[{kwargs.get('aggregation_op', args[2] if len(args) > 2 else 'max_min')}]"
+
+#(module, function or Class.method, function of (args, kwargs) naming the stage or None to use the method's name)
+#methods are also instrumented on every subclass that overrides them, under the same stage
+TARGETS = [
+    ("memberships", "Membership.interp", None),
+    ("memberships", "Membership.interp_many", None),
+    ("memberships", "Membership.centroid", None),
+    ("fis", "Rule.evaluate", None),
+    ("fis", "Rule.defuzzify", defuzzify_stage),
+    ("fis", "RuleBase.firing_strengths", None),
+    ("fis", "RuleBase.aggregate", None),
+    ("fis", "TSKRuleBase.infer", None),
+    ("lookup", "LookupTable.lookup", None),
+    ("lookup", "LookupTable.lookup_many", None),
+    ("zadeh_fis", "RuleGenerator.evaluate", None),
+    ("zadeh_fis", "RuleGenerator.evaluate_many", None),
+    ("simulation", "Car.getWallDistances", None),
+    ("simulation", "Car.cast_rays", None),
+    ("simulation", "Car.ray_distances", None),
+    ("simulation", "Car.car_collide", None),
+    ("simulation", "BatchSimulation.wall_distances", None),
+]
+
+ENABLED = False
+TRACE = False
+MAX_EVENTS = 1000000
+STATS = {} #stage -> [calls, total seconds, max seconds]
+COUNTERS = {}
+EVENTS = [] #Chrome trace events
+START = time.perf_counter()
+patched = [] #(owner, name, original) to restore
+
+def record(stage: str, start: float, end: float):
+    duration = end - start
+    stats = STATS.get(stage)
+    if stats is None:
+        stats = STATS[stage] = [0, 0.0, 0.0]
+    stats[0] += 1
+    stats[1] += duration
+    if duration > stats[2]:
+        stats[2] = duration
+    if TRACE and len(EVENTS) < MAX_EVENTS:
+        EVENTS.append({"name": stage, "ph": "X", "ts": (start - START) * 1e6, "dur": duration * 1e6,
+                       "pid": os.getpid(), "tid": threading.get_ident()})
+
+def timed(function, stage: str, label = None):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(stage if label is None else label(args, kwargs), start, time.perf_counter())
+    return wrapper
+
+#Every class in the hierarchy under cls that defines name itself
+def overriding_classes(cls, name: str) -> list:
+    classes = [cls] if name in cls.__dict__ else []
+    for subclass in cls.__subclasses__():
+        classes += [c for c in overriding_classes(subclass, name) if c not in classes]
+    return classes
+
+#Starts timing the targets, trace - also keep every call as a Chrome trace event (up to MAX_EVENTS)
+#targets whose module can't be imported (no pygame for simulation) are skipped
+def enable(trace = False, targets = None):
+    global ENABLED, TRACE
+    if ENABLED:
+        disable()
+
+    for module_name, qualname, label in TARGETS if targets is None else targets:
+        try:
+            module = importlib.import_module(("." if __package__ else "") + module_name, __package__ or None)
+        except ImportError:
+            continue
+
+        if "." in qualname:
+            class_name, name = qualname.split(".")
+            owners = overriding_classes(getattr(module, class_name), name)
+        else:
+            name = qualname
+            owners = [module]
+
+        for owner in owners:
+            original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(timed(original.__func__, qualname, label))
+            else:
+                wrapped = timed(original, qualname, label)
+            setattr(owner, name, wrapped)
+            patched.append((owner, name, original))
+
+    ENABLED = True
+    TRACE = trace
+
+def disable():
+    global ENABLED, TRACE
+    while patched:
+        owner, name, original = patched.pop()
+        setattr(owner, name, original)
+    ENABLED = False
+    TRACE = False
+
+def reset():
+    STATS.clear()
+    COUNTERS.clear()
+    EVENTS.clear()
+
+#Times a block under stage, a shared do nothing context when disabled
+class Stage:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter())
+        return False
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+null_stage = NullStage()
+
+def stage(name: str):
+    return Stage(name) if ENABLED else null_stage
+
+#Counts an event, for things that are worth counting but not timing
+def count(name: str, n = 1):
+    if ENABLED:
+        COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+#{stage: {calls, total_s, mean_s, max_s}} and {counter: count}
+def results() -> dict:
+    stages = {name: {"calls": calls, "total_s": total, "mean_s": total / calls, "max_s": longest}
+              for name, (calls, total, longest) in STATS.items()}
+    return {"stages": stages, "counters": dict(COUNTERS)}
+
+#Table of every stage by total time, then the counters
+def summary() -> str:
+    lines = [f"{'stage':40s} {'calls':>10s} {'total ms':>12s} {'mean us':>12s} {'max us':>12s}"]
+    for name, (calls, total, longest) in sorted(STATS.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:40s} {calls:10d} {total*1e3:12.3f} {total/calls*1e6:12.3f} {longest*1e6:12.3f}")
+    for name, n in sorted(COUNTERS.items()):
+        lines.append(f"{name:40s} {n:10d}")
+    return "\n".join(lines)
+
+#Chrome trace (chrome://tracing or Perfetto), the summary goes in otherData
+def save_trace(path):
+    with open(path, "w") as f:
+        json.dump({"traceEvents": EVENTS, "displayTimeUnit": "ms", "otherData": results()}, f)
+
+def save_results(path):
+    with open(path, "w") as f:
+        json.dump(results(), f, indent=2)
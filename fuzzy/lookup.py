@@ -0,0 +1,93 @@
+import numpy as np
+import itertools
+import bisect
+
+#A controller (any function that maps an (N, n_inputs) array to an (N,) array, like RuleBase.infer)
+#precomputed on a grid over its input domains, so running it is one table lookup
+#method - "linear" interpolates between the grid points (multilinear), "nearest" snaps to the closest one
+#use "nearest" for controllers that jump between values like max_min, interpolating across a jump makes up outputs
+class LookupTable:
+    def __init__(self, axes: [np.ndarray], table: np.ndarray, method = "linear"):
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.table = np.asarray(table, dtype=float)
+        self.method = method
+        self.dim = len(self.axes)
+        self.axis_lists = [axis.tolist() for axis in self.axes]
+        self.corners = list(itertools.product((0, 1), repeat=self.dim))
+
+    #domains - [(min, max)] for each input, resolution - grid points per input (an int or one per input)
+    @staticmethod
+    def compile(controller, domains: [(float, float)], resolution = 21, method = "linear", batch_size = 65536):
+        if np.ndim(resolution) == 0:
+            resolution = [resolution] * len(domains)
+
+        axes = [np.linspace(x_min, x_max, n) for (x_min, x_max), n in zip(domains, resolution)]
+        grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+
+        table = np.zeros(len(grid))
+        for start in range(0, len(grid), batch_size):
+            table[start:start+batch_size] = controller(grid[start:start+batch_size])
+
+        return LookupTable(axes, table.reshape([len(axis) for axis in axes]), method)
+
+    #Output for one input (a list of n_inputs values), plain python since numpy's overhead dwarfs one lookup
+    def lookup(self, x: [float]) -> float:
+        lower = []
+        fraction = []
+        for i, axis in enumerate(self.axis_lists):
+            j = min(max(bisect.bisect_right(axis, x[i]) - 1, 0), len(axis) - 2)
+            lower.append(j)
+            fraction.append(min(max((x[i]-axis[j])/(axis[j+1]-axis[j]), 0.0), 1.0))
+
+        if self.method == "nearest":
+            return float(self.table[tuple(j + (t >= 0.5) for j, t in zip(lower, fraction))])
+
+        result = 0.0
+        for corner in self.corners:
+            weight = 1.0
+            for i, upper in enumerate(corner):
+                weight *= fraction[i] if upper else 1.0 - fraction[i]
+            if weight > 0:
+                result += weight * self.table[tuple(lower[i] + upper for i, upper in enumerate(corner))]
+        return float(result)
+
+    #Output for every row of X (shape (N, n_inputs)), inputs outside of the domains are clamped onto them
+    def lookup_many(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+
+        #cell each input is in and how far along the cell it is
+        lower = []
+        fraction = []
+        for i, axis in enumerate(self.axes):
+            j = np.clip(np.searchsorted(axis, X[:, i], side="right") - 1, 0, len(axis) - 2)
+            lower.append(j)
+            fraction.append(np.clip((X[:, i]-axis[j])/(axis[j+1]-axis[j]), 0.0, 1.0))
+
+        if self.method == "nearest":
+            return self.table[tuple(j + (t >= 0.5) for j, t in zip(lower, fraction))]
+
+        #weighted sum over the 2^n corners of the cell
+        result = np.zeros(X.shape[0])
+        for corner in self.corners:
+            weight = np.ones(X.shape[0])
+            for i, upper in enumerate(corner):
+                weight *= fraction[i] if upper else 1.0 - fraction[i]
+            result += weight * self.table[tuple(lower[i] + upper for i, upper in enumerate(corner))]
+
+        return result
+
+    #Largest difference from the exact controller, over X or over n_samples random points in the domains
+    def max_error(self, controller, X = None, n_samples = 10000, seed = None) -> float:
+        if X is None:
+            rng = np.random.default_rng(seed)
+            X = np.stack([rng.uniform(axis[0], axis[-1], n_samples) for axis in self.axes], axis=-1)
+        return float(np.max(np.abs(self.lookup_many(X) - controller(X))))
+
+    def save(self, path):
+        np.savez(path, table=self.table, method=self.method, **{f"axis_{i}": axis for i, axis in enumerate(self.axes)})
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            axes = [data[f"axis_{i}"] for i in range(data["table"].ndim)]
+            return LookupTable(axes, data["table"], str(data["method"]))
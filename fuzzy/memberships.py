@@ -1,13 +1,37 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import util
-from math import sqrt, exp, pi
+import functools
+from math import sqrt, exp, pi, erf
+#relative when imported as the fuzzy package, bare when run from inside fuzzy/
+if __package__:
+    from . import util
+else:
+    import util
+
+#Memoizes a Membership method on its arguments, the cache is thrown out whenever membership is set
+#Arrays that come out of the cache are read-only since every caller gets the same one
+def cached(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        if key in self.cache:
+            self.cache_hits += 1
+            return self.cache[key]
+
+        self.cache_misses += 1
+        value = method(self, *args, **kwargs)
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        self.cache[key] = value
+        return value
+    return wrapper
 
 class Membership:
     def __init__(self, x_min, x_max, x_step=1, mem_func=None, init_membership=True):
         self.x_min = x_min
         self.x_max = x_max
         self.x_step = x_step
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.x_qual = np.arange(x_min, x_max+x_step, x_step)
         self.membership = np.zeros(len(self.x_qual))
 
@@ -15,32 +39,63 @@ class Membership:
             for i in range(len(self.x_qual)):
                 self.membership[i] = util.into_range(0,1,mem_func(self.x_qual[i]))
 
+    #Setting membership (or set_membership_output) clears the cache
+    #Editing the array in place (membership[i] = ...) does not, call clear_cache() and set pristine = False after doing that
+    #pristine - the samples are still the ones the constructor made, so subclasses can use their closed forms for the exact (dx=None) results
+    @property
+    def membership(self):
+        return self._membership
+
+    @membership.setter
+    def membership(self, membership):
+        self._membership = np.asarray(membership, dtype=float)
+        self.pristine = False
+        self.clear_cache()
+
+    def clear_cache(self):
+        self.cache = {}
+
+    def cache_info(self) -> dict:
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self.cache)}
+
     def interp(self, x):
         #assume anything outside of the domain of x has a membership of zero
         if x<self.x_min or x>self.x_max:
             return 0
-        
-        #get index of value that is closet to x and less than or equal to than x
-        i = np.where(self.x_qual == util.get_closest_value(self.x_qual, x))[0][0]
 
-        if(x==self.x_qual[i]):
-            return self.membership[i]
+        #interpolation time baby (x_qual is sorted, so np.interp binary searches for us)
+        return np.interp(x, self.x_qual, self.membership)
+
+    #interp over a whole array of inputs at once, returns an array the same shape as xs
+    def interp_many(self, xs) -> np.ndarray:
+        xs = np.asarray(xs, dtype=float)
+        ys = np.interp(xs, self.x_qual, self.membership)
 
-        #interpolation time baby
-        return self.membership[i] + (self.membership[i+1]-self.membership[i])/(self.x_qual[i+1]-self.x_qual[i])*(x-self.x_qual[i])
+        #assume anything outside of the domain of x has a membership of zero
+        return np.where((xs<self.x_min) | (xs>self.x_max), 0.0, ys)
 
     def alpha_cut(self, alpha:float, x=None):
-        if x == None:
+        if x is None:
             #return all values from x_qual that sastify the alpha cut
-            cut_x = []
-            for i in range(len(self.x_qual)):
-                if self.membership[i]>=alpha:
-                    cut_x.append(self.x_qual[i])
-            return cut_x
+            return list(self.alpha_cut_values(alpha))
         else:
             #return if x sastify the alpha cut
             return self.interp(x)>=alpha
-        
+
+    @cached
+    def alpha_cut_values(self, alpha:float) -> np.ndarray:
+        return self.x_qual[self.membership>=alpha]
+
+    #values from x_qual with a nonzero membership
+    @cached
+    def support(self) -> np.ndarray:
+        return self.x_qual[self.membership>0]
+
+    #values from x_qual with a membership of one
+    @cached
+    def core(self) -> np.ndarray:
+        return self.x_qual[self.membership>=1.0]
+
     def get_input_range(self):
         return self.x_qual
     
@@ -49,13 +104,53 @@ class Membership:
         #get index of value that is closet to x and less than or equal to than x
         i = np.where(self.x_qual == util.get_closest_value(self.x_qual, x_value))[0][0]
         self.membership[i] = output_value
+        self.pristine = False
+        self.clear_cache()
     
+    #A Membership on the grid x_min, x_max, x_step with the given membership values (one per point of the grid)
+    @staticmethod
+    def from_array(x_min, x_max, x_step, membership):
+        mem_func = Membership(x_min, x_max, x_step, init_membership=False)
+        mem_func.membership = membership
+        return mem_func
+
+    #This set sampled onto another grid, zero outside of its domain
+    def resample(self, x_min, x_max, x_step):
+        return Membership.from_array(x_min, x_max, x_step, self.interp_many(np.arange(x_min, x_max+x_step, x_step)))
+
+    #The complements aren't cached, every call returns a new Membership the caller is free to change
+    def compliment(self): #Returns a membership function
+        return Membership.from_array(self.x_min, self.x_max, self.x_step, 1.0-self.membership)
+
     def yager_compliment(self, w = 1.0): #Returns a membership function
-        negated_membership = Membership(self.x_min, self.x_max, self.x_step, init_membership=False)
-        for i in range(len(self.x_qual)):
-            negated_membership.set_membership_output(self.x_qual[i], (1.0-(self.membership[i])**(w))**(1.0/w))
-        return negated_membership
-    
+        return Membership.from_array(self.x_min, self.x_max, self.x_step, (1.0-self.membership**w)**(1.0/w))
+
+    #l > -1, l = 0 is the standard compliment
+    def sugeno_compliment(self, l = 0.0): #Returns a membership function
+        return Membership.from_array(self.x_min, self.x_max, self.x_step, (1.0-self.membership)/(1.0+l*self.membership))
+
+    #norm is any function of two membership arrays, like np.maximum/np.minimum or the t-norms and s-norms in fis
+    #if the sets are on different grids both are resampled onto one covering both domains at the finer step
+    def union(self, other, s_norm = np.maximum): #Returns a membership function
+        x_min, x_max, x_step, a, b = aligned(self, other)
+        return Membership.from_array(x_min, x_max, x_step, s_norm(a, b))
+
+    def intersection(self, other, t_norm = np.minimum): #Returns a membership function
+        x_min, x_max, x_step, a, b = aligned(self, other)
+        return Membership.from_array(x_min, x_max, x_step, t_norm(a, b))
+
+    #largest membership of the set
+    @cached
+    def height(self) -> float:
+        return float(np.max(self.membership)) if len(self.membership) else 0.0
+
+    #(k, 2) array of the [start, end] of every stretch of x_qual that sastifies the alpha cut
+    @cached
+    def alpha_cut_intervals(self, alpha:float) -> np.ndarray:
+        inside = np.concatenate([[False], self.membership>=alpha, [False]])
+        edges = np.flatnonzero(inside[1:] != inside[:-1])
+        return np.stack([self.x_qual[edges[0::2]], self.x_qual[edges[1::2]-1]], axis=-1)
+
     def graph(self, x_qual = None, title = None, x_label = None):
         if x_qual is None:
             x_qual = self.x_qual
@@ -65,6 +160,7 @@ class Membership:
             for i in range(len(x_qual)):
                 membership[i] = self.interp(x_qual[i])
 
+        import matplotlib.pyplot as plt
         fig, ax0 = plt.subplots(nrows=1, figsize=(8, 4))
 
         if title is not None:
@@ -74,30 +170,163 @@ class Membership:
 
         ax0.plot(x_qual, membership, 'b', linewidth=1.5)
     
-    #assume real-valued domain if dx>0, assume discrete domain otherwise
-    #left rienmann sum time fellas
-    def centroid(self, dx = 0.01) -> float:
-        numerator = 0
-        demoninator = 0
+    #Returns the (x, membership) arrays the defuzzifiers sum over, None means use the exact continuous membership
+    #assume discrete domain if dx<=0, otherwise left riemann sample it every dx
+    def sample_membership(self, dx):
+        if dx is None:
+            return None
 
         if dx <= 0:
-            for i in range(len(self.x_qual)):
-                numerator += self.x_qual[i] * self.membership[i]
-                demoninator += self.membership[i]
-            
-        else:
-            x_array = np.arange(self.x_min, self.x_max,dx)
+            return np.asarray(self.x_qual, dtype=float), np.asarray(self.membership, dtype=float)
+
+        x_array = np.arange(self.x_min, self.x_max, dx)
+        return x_array, self.interp_many(x_array)
+
+    #Knots of the membership as a piecewise linear function, subclasses with a closed form return their corners
+    def linear_nodes(self):
+        return np.asarray(self.x_qual, dtype=float), np.asarray(self.membership, dtype=float)
+
+    #Area under the membership and its first moment over [x_min, x_max], integrated exactly
+    def exact_moments(self) -> (float, float):
+        segments = linear_segments(*self.linear_nodes(), self.x_min, self.x_max)
+        return linear_moments(*segments)
+
+    def exact_bisector(self) -> float:
+        segments = linear_segments(*self.linear_nodes(), self.x_min, self.x_max)
+        return linear_bisector(*segments)
+
+    def exact_maxima(self) -> (float, float, float):
+        segments = linear_segments(*self.linear_nodes(), self.x_min, self.x_max)
+        return linear_maxima(*segments)
+
+    #dx>0 - left riemann sum, dx<=0 - discrete domain, dx=None - exact integral
+    @cached
+    def centroid(self, dx = 0.01) -> float:
+        samples = self.sample_membership(dx)
+
+        if samples is None:
+            area, moment = self.exact_moments()
+            return moment/area
+
+        x_array, membership = samples
+        return np.dot(x_array, membership)/np.sum(membership)
+
+    #x that splits the area under the membership in half
+    @cached
+    def bisector(self, dx = 0.01) -> float:
+        samples = self.sample_membership(dx)
+
+        if samples is None:
+            return self.exact_bisector()
+
+        x_array, membership = samples
+        running_area = np.cumsum(membership)
+        return x_array[np.searchsorted(running_area, running_area[-1]/2)]
+
+    #Returns (smallest, mean, largest) of the x's with the highest membership
+    @cached
+    def maxima(self, dx = 0.01) -> (float, float, float):
+        samples = self.sample_membership(dx)
+
+        if samples is None:
+            return self.exact_maxima()
+
+        x_array, membership = samples
+        x_max_membership = x_array[np.isclose(membership, np.max(membership), rtol=1e-9, atol=1e-12)]
+        return x_max_membership[0], np.mean(x_max_membership), x_max_membership[-1]
+
+    def mean_of_maxima(self, dx = 0.01) -> float:
+        return self.maxima(dx)[1]
+
+    def smallest_of_maxima(self, dx = 0.01) -> float:
+        return self.maxima(dx)[0]
+
+    def largest_of_maxima(self, dx = 0.01) -> float:
+        return self.maxima(dx)[2]
+
+#The grid and membership values of a and b for a set operation, returns (x_min, x_max, x_step, a values, b values)
+#Sets on the same grid are used as they are, otherwise both are sampled onto a grid covering both at the finer step
+def aligned(a: Membership, b: Membership):
+    a_x, b_x = a.x_qual, b.x_qual
+    if a.x_min == b.x_min and a.x_max == b.x_max and len(a_x) == len(b_x) and np.allclose(a_x, b_x):
+        return a.x_min, a.x_max, a.x_step, np.asarray(a.membership), np.asarray(b.membership)
+
+    x_min, x_max, x_step = min(a.x_min, b.x_min), max(a.x_max, b.x_max), min(a.x_step, b.x_step)
+    x_qual = np.arange(x_min, x_max+x_step, x_step)
+    return x_min, x_max, x_step, a.interp_many(x_qual), b.interp_many(x_qual)
+
+#Piecewise linear helpers for the exact defuzzifiers
+#Clips the function through the knots (xs, ys) to [lo, hi], returns the segments' start/end x and start/end y
+#Outside of the knots the function is zero, repeated xs are allowed for vertical jumps
+def linear_segments(xs, ys, lo, hi):
+    x0, x1, y0, y1 = xs[:-1], xs[1:], ys[:-1], ys[1:]
+    slope = np.where(x1>x0, (y1-y0)/np.where(x1>x0, x1-x0, 1.0), 0.0)
+
+    c0, c1 = np.clip(x0, lo, hi), np.clip(x1, lo, hi)
+    keep = c1>c0
+    c0, c1, x0, y0, slope = c0[keep], c1[keep], x0[keep], y0[keep], slope[keep]
+
+    return c0, c1, y0 + slope*(c0-x0), y0 + slope*(c1-x0)
 
-            for x in x_array:
-                numerator += x * self.interp(x) * dx
-                demoninator += self.interp(x) * dx
+#Returns the area and first moment of the segments
+def linear_moments(x0, x1, y0, y1) -> (float, float):
+    h = x1 - x0
+    area = np.sum(h*(y0+y1))/2
+    moment = np.sum(h*(x0*(2*y0+y1) + x1*(y0+2*y1)))/6
+    return area, moment
 
-        return numerator/demoninator
+#Weights that turn the values at the knots xs into the area and first moment over [lo, hi]
+#area = area_w @ ys, moment = moment_w @ ys, handy when many functions share the same knots
+def linear_weights(xs, lo, hi):
+    x0, x1 = xs[:-1], xs[1:]
+    c0, c1 = np.clip(x0, lo, hi), np.clip(x1, lo, hi)
+    h = np.maximum(c1-c0, 0.0)
+
+    #clipped segment ends as a mix of the two knots, y(c0) = (1-a)*y0 + a*y1, y(c1) = (1-b)*y0 + b*y1
+    width = np.where(x1>x0, x1-x0, 1.0)
+    a, b = (c0-x0)/width, (c1-x0)/width
+    p, q = h*(2*c0+c1)/6, h*(c0+2*c1)/6
+
+    area_w = np.zeros(len(xs))
+    moment_w = np.zeros(len(xs))
+    area_w[:-1] += h/2*((1-a) + (1-b))
+    area_w[1:] += h/2*(a + b)
+    moment_w[:-1] += p*(1-a) + q*(1-b)
+    moment_w[1:] += p*a + q*b
+    return area_w, moment_w
+
+def linear_bisector(x0, x1, y0, y1) -> float:
+    h = x1 - x0
+    running_area = np.cumsum(h*(y0+y1)/2)
+    i = min(np.searchsorted(running_area, running_area[-1]/2), len(h)-1)
+
+    #area left to cover inside segment i, solve y0*s + slope*s^2/2 = remaining for s
+    remaining = running_area[-1]/2 - (running_area[i-1] if i>0 else 0.0)
+    slope = (y1[i]-y0[i])/h[i]
+    if abs(slope) < 1e-12:
+        return x0[i] + (remaining/y0[i] if y0[i]>0 else 0.0)
+    return x0[i] + (sqrt(max(y0[i]**2 + 2*slope*remaining, 0.0)) - y0[i])/slope
+
+def linear_maxima(x0, x1, y0, y1) -> (float, float, float):
+    height = max(np.max(y0), np.max(y1))
+    at_max_0, at_max_1 = np.isclose(y0, height, rtol=1e-9, atol=1e-12), np.isclose(y1, height, rtol=1e-9, atol=1e-12)
+    ends = np.concatenate([x0[at_max_0], x1[at_max_1]])
+
+    #a flat top is an interval, take its midpoint weighted by its length, otherwise the peaks are points
+    flat = at_max_0 & at_max_1
+    if np.any(flat):
+        mean = np.sum((x0[flat]+x1[flat])/2*(x1[flat]-x0[flat]))/np.sum(x1[flat]-x0[flat])
+    else:
+        mean = np.mean(ends)
+
+    return np.min(ends), mean, np.max(ends)
 
 class TriangleMembership(Membership):
      #points - [min value, middle point, max value]
      def __init__(self, x_min, x_max, points:list, x_step=1, max_value = 1.0):
         super().__init__(x_min, x_max, x_step=x_step, mem_func=None, init_membership=False)
+        self.points = list(points)
+        self.max_value = max_value
 
         points_reached = [False, False, False]
 
@@ -128,10 +357,25 @@ class TriangleMembership(Membership):
             if self.x_qual[i] > points[2]:
                 break
 
+        #the samples only trace the triangle if every point is on the grid
+        self.pristine = all(points_reached)
+
+     def linear_nodes(self):
+        return self.corner_nodes() if self.pristine else Membership.linear_nodes(self)
+
+     #the corners of the triangle, a vertical edge when two points are the same
+     def corner_nodes(self):
+        p = self.points
+        left = self.max_value if p[1] == p[0] else 0.0
+        right = self.max_value if p[2] == p[1] else 0.0
+        return np.array([p[0], p[0], p[1], p[2], p[2]], dtype=float), np.array([0.0, left, self.max_value, right, 0.0])
+
 class TrapizoidalMembership(Membership):
     #points - [min value, left corner, right corner, max value]
     def __init__(self, x_min, x_max, points:list, x_step=1, max_value = 1.0):
         super().__init__(x_min, x_max, x_step=x_step, mem_func=None, init_membership=False)
+        self.points = list(points)
+        self.max_value = max_value
 
         points_reached = [False, False, False, False]
 
@@ -167,12 +411,31 @@ class TrapizoidalMembership(Membership):
             if self.x_qual[i] > points[3]:
                 break
 
+        #the samples only trace the trapezoid if every point is on the grid
+        self.pristine = all(points_reached)
+
+    def linear_nodes(self):
+        return self.corner_nodes() if self.pristine else Membership.linear_nodes(self)
+
+    #the corners of the trapezoid, a vertical edge when two points are the same
+    def corner_nodes(self):
+        p = self.points
+        left = self.max_value if p[1] == p[0] else 0.0
+        right = self.max_value if p[3] == p[2] else 0.0
+        return (np.array([p[0], p[0], p[1], p[2], p[3], p[3]], dtype=float),
+                np.array([0.0, left, self.max_value, self.max_value, right, 0.0]))
+
 class GaussianMembership(Membership):
     #points - [min value, left corner, right corner, max value]
     #have max_value = 1/sqrt(2pi*stddeviation^2) for a normal distribution
     def __init__(self, x_min, x_max, mean, stddeviation, x_step=0.1, max_value = 1.0):
+        self.mean = mean
+        self.stddeviation = stddeviation
+        self.max_value = max_value
         self.membership_func = lambda x: max_value*exp(-(x-mean)**2/(2*stddeviation**2))
         super().__init__(x_min, x_max, x_step=x_step, mem_func=self.membership_func, init_membership=True)
+        #samples are clipped to 1, the closed forms aren't
+        self.pristine = max_value <= 1.0
 
     def interp(self, x):
         #assume anything outside of the domain of x has a membership of zero
@@ -182,7 +445,179 @@ class GaussianMembership(Membership):
         #technically its not interpolation, however the gaussian is already created so its better to use that
         return self.membership_func(x)
 
+    def interp_many(self, xs) -> np.ndarray:
+        xs = np.asarray(xs, dtype=float)
+        ys = self.max_value*np.exp(-(xs-self.mean)**2/(2*self.stddeviation**2))
+
+        #assume anything outside of the domain of x has a membership of zero
+        return np.where((xs<self.x_min) | (xs>self.x_max), 0.0, ys)
+
+    #area under the gaussian from x_min to x
+    def area_to(self, x) -> float:
+        scale = self.stddeviation*sqrt(2)
+        return self.max_value*self.stddeviation*sqrt(pi/2)*(erf((x-self.mean)/scale) - erf((self.x_min-self.mean)/scale))
+
+    #closed form integral of the gaussian truncated to [x_min, x_max]
+    def exact_moments(self) -> (float, float):
+        if not self.pristine:
+            return Membership.exact_moments(self)
+        area = self.area_to(self.x_max)
+        tails = exp(-(self.x_min-self.mean)**2/(2*self.stddeviation**2)) - exp(-(self.x_max-self.mean)**2/(2*self.stddeviation**2))
+        return area, self.mean*area + self.max_value*self.stddeviation**2*tails
+
+    def exact_bisector(self) -> float:
+        if not self.pristine:
+            return Membership.exact_bisector(self)
+        #area_to is increasing, so bisect it
+        half_area = self.area_to(self.x_max)/2
+        lo, hi = self.x_min, self.x_max
+        for _ in range(60):
+            mid = (lo + hi)/2
+            if self.area_to(mid) < half_area:
+                lo = mid
+            else:
+                hi = mid
+        return (lo + hi)/2
+
+    def exact_maxima(self) -> (float, float, float):
+        if not self.pristine:
+            return Membership.exact_maxima(self)
+        peak = util.into_range(self.x_min, self.x_max, self.mean)
+        return peak, peak, peak
+
+#Parametric memberships only store their parameters and evaluate func exactly on demand
+#x_qual/membership are only sampled (and cached) the first time something discrete asks for them
+#The sampled arrays are read-only, use to_membership() to get an editable copy
+class ParametricMembership(Membership):
+    #they can't be edited, so their closed forms always hold
+    pristine = True
+
+    def __init__(self, x_min, x_max, x_step=1):
+        self.x_min = x_min
+        self.x_max = x_max
+        self.x_step = x_step
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.clear_cache()
+
+    #exact membership of every value in xs, subclasses fill this in
+    def func(self, xs) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def x_qual(self):
+        return self.grid()
+
+    @property
+    def membership(self):
+        return self.grid_membership()
+
+    @cached
+    def grid(self) -> np.ndarray:
+        return np.arange(self.x_min, self.x_max+self.x_step, self.x_step)
+
+    @cached
+    def grid_membership(self) -> np.ndarray:
+        return np.clip(self.func(self.x_qual), 0, 1)
+
+    def interp(self, x):
+        #assume anything outside of the domain of x has a membership of zero
+        if x<self.x_min or x>self.x_max:
+            return 0
+        #clipped like the grid, so max_value > 1 gives the same values as membership
+        return float(np.clip(self.func(np.asarray(x, dtype=float)), 0, 1))
+
+    def interp_many(self, xs) -> np.ndarray:
+        xs = np.asarray(xs, dtype=float)
+        return np.where((xs<self.x_min) | (xs>self.x_max), 0.0, np.clip(self.func(xs), 0, 1))
+
+    def set_membership_output(self, x_value, output_value):
+        raise TypeError("parametric memberships can't be edited, use to_membership() first")
+
+    #sampled copy that behaves exactly like the grid based memberships
+    def to_membership(self) -> Membership:
+        sampled = Membership(self.x_min, self.x_max, self.x_step, init_membership=False)
+        sampled.membership = np.array(self.membership)
+        return sampled
+
+#nodes - x's of the knots (sorted, repeat an x for a vertical jump), values - membership at each knot
+#zero outside of the knots
+class PiecewiseLinearMembership(ParametricMembership):
+    def __init__(self, x_min, x_max, nodes:list, values:list, x_step=1):
+        super().__init__(x_min, x_max, x_step=x_step)
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        #knots above 1 get clipped, so the exact results come from the grid instead
+        self.pristine = bool(np.all(self.values <= 1.0))
+
+    def func(self, xs) -> np.ndarray:
+        #at a vertical jump take the higher side, interp from both ends to get both sides
+        from_left = np.interp(xs, self.nodes, self.values, left=0.0, right=0.0)
+        from_right = np.interp(-xs, -self.nodes[::-1], self.values[::-1], left=0.0, right=0.0)
+        return np.maximum(from_left, from_right)
+
+    def linear_nodes(self):
+        return (self.nodes, self.values) if self.pristine else Membership.linear_nodes(self)
+
+#points - [min value, middle point, max value]
+class ParametricTriangleMembership(PiecewiseLinearMembership):
+    def __init__(self, x_min, x_max, points:list, x_step=1, max_value = 1.0):
+        self.points = list(points)
+        self.max_value = max_value
+        nodes, values = TriangleMembership.corner_nodes(self)
+        super().__init__(x_min, x_max, nodes, values, x_step=x_step)
+
+#points - [min value, left corner, right corner, max value]
+class ParametricTrapizoidalMembership(PiecewiseLinearMembership):
+    def __init__(self, x_min, x_max, points:list, x_step=1, max_value = 1.0):
+        self.points = list(points)
+        self.max_value = max_value
+        nodes, values = TrapizoidalMembership.corner_nodes(self)
+        super().__init__(x_min, x_max, nodes, values, x_step=x_step)
+
+class ParametricGaussianMembership(ParametricMembership):
+    def __init__(self, x_min, x_max, mean, stddeviation, x_step=0.1, max_value = 1.0):
+        super().__init__(x_min, x_max, x_step=x_step)
+        self.mean = mean
+        self.stddeviation = stddeviation
+        self.max_value = max_value
+        #the grid is clipped to 1, the closed forms aren't
+        self.pristine = max_value <= 1.0
+
+    def func(self, xs) -> np.ndarray:
+        return self.max_value*np.exp(-(xs-self.mean)**2/(2*self.stddeviation**2))
+
+    #same closed forms as the sampled gaussian
+    area_to = GaussianMembership.area_to
+    exact_moments = GaussianMembership.exact_moments
+    exact_bisector = GaussianMembership.exact_bisector
+    exact_maxima = GaussianMembership.exact_maxima
+
+#generalized bell - 1/(1+|(x-center)/width|^(2*slope))
+class BellMembership(ParametricMembership):
+    def __init__(self, x_min, x_max, width, slope, center, x_step=0.1, max_value = 1.0):
+        super().__init__(x_min, x_max, x_step=x_step)
+        self.width = width
+        self.slope = slope
+        self.center = center
+        self.max_value = max_value
+
+    def func(self, xs) -> np.ndarray:
+        return self.max_value/(1 + np.abs((xs-self.center)/self.width)**(2*self.slope))
+
+#sigmoid - 1/(1+exp(-slope*(x-center))), negative slope for a falling edge
+class SigmoidMembership(ParametricMembership):
+    def __init__(self, x_min, x_max, slope, center, x_step=0.1, max_value = 1.0):
+        super().__init__(x_min, x_max, x_step=x_step)
+        self.slope = slope
+        self.center = center
+        self.max_value = max_value
+
+    def func(self, xs) -> np.ndarray:
+        return self.max_value/(1 + np.exp(-self.slope*(xs-self.center)))
+
 def test():
+    import matplotlib.pyplot as plt
     print("test")
     x_qual = np.arange(0,11,1)
     membership = GaussianMembership(0,10,5,2)
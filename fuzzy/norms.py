@@ -0,0 +1,92 @@
+import numpy as np
+import functools
+
+#t-norms (fuzzy AND) and s-norms (fuzzy OR) as array operations
+#norm(a, b) works elementwise like a numpy ufunc, norm.reduce(values, axis) combines everything along an axis,
+#so the firing strengths of (samples x rules x anecedents) come out of one reduce over the last axis
+class Norm:
+    #binary - function of two arrays, reducer - n-ary version as function of (values, axis) if there is a closed form
+    #identity - what reducing nothing gives (1 for t-norms, 0 for s-norms)
+    def __init__(self, name: str, binary, reducer = None, identity = 1.0):
+        self.name = name
+        self.binary = binary
+        self.reducer = reducer
+        self.identity = identity
+
+    def __call__(self, a, b) -> np.ndarray:
+        return self.binary(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+
+    def reduce(self, values, axis = -1) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        if values.shape[axis] == 0:
+            return np.full(np.delete(values.shape, axis if axis >= 0 else values.ndim + axis), self.identity)
+        if self.reducer is not None:
+            return self.reducer(values, axis)
+
+        #norms are associative, so fold them over the axis
+        return functools.reduce(self.binary, np.moveaxis(values, axis, 0))
+
+    def __repr__(self):
+        return f"Norm({self.name})"
+
+#a/b where b isn't 0, otherwise where_zero
+def safe_divide(a, b, where_zero):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b == 0, where_zero, a / np.where(b == 0, 1.0, b))
+
+#Zadeh
+zadeh_t_norm = Norm("zadeh", np.minimum, lambda values, axis: np.min(values, axis=axis), identity=1.0)
+zadeh_s_norm = Norm("zadeh", np.maximum, lambda values, axis: np.max(values, axis=axis), identity=0.0)
+
+#Product and probabilistic sum
+product_t_norm = Norm("product", np.multiply, lambda values, axis: np.prod(values, axis=axis), identity=1.0)
+probabilistic_s_norm = Norm("probabilistic", lambda a, b: a + b - a*b,
+                            lambda values, axis: 1.0 - np.prod(1.0 - values, axis=axis), identity=0.0)
+
+#Lukasiewicz and bounded sum
+lukasiewicz_t_norm = Norm("lukasiewicz", lambda a, b: np.maximum(0.0, a + b - 1.0),
+                          lambda values, axis: np.maximum(0.0, np.sum(values, axis=axis) - (values.shape[axis] - 1)), identity=1.0)
+lukasiewicz_s_norm = Norm("lukasiewicz", lambda a, b: np.minimum(1.0, a + b),
+                          lambda values, axis: np.minimum(1.0, np.sum(values, axis=axis)), identity=0.0)
+
+#Drastic - only nonzero (not one) when every other value is the identity
+drastic_t_norm = Norm("drastic", lambda a, b: np.where(a == 1.0, b, np.where(b == 1.0, a, 0.0)),
+                      lambda values, axis: np.where(np.sum(values < 1.0, axis=axis) <= 1, np.min(values, axis=axis), 0.0), identity=1.0)
+drastic_s_norm = Norm("drastic", lambda a, b: np.where(a == 0.0, b, np.where(b == 0.0, a, 1.0)),
+                      lambda values, axis: np.where(np.sum(values > 0.0, axis=axis) <= 1, np.max(values, axis=axis), 1.0), identity=0.0)
+
+#Hamacher product and sum
+hamacher_t_norm = Norm("hamacher", lambda a, b: safe_divide(a*b, a + b - a*b, 0.0), identity=1.0)
+hamacher_s_norm = Norm("hamacher", lambda a, b: safe_divide(a + b - 2*a*b, 1.0 - a*b, 1.0), identity=0.0)
+
+#Einstein product and sum
+einstein_t_norm = Norm("einstein", lambda a, b: a*b/(2.0 - (a + b - a*b)), identity=1.0)
+einstein_s_norm = Norm("einstein", lambda a, b: (a + b)/(1.0 + a*b), identity=0.0)
+
+#Yager, w > 0, w = 1 is Lukasiewicz and w -> inf approaches Zadeh
+def yager_t_norm(w = 2.0) -> Norm:
+    return Norm(f"yager({w})", lambda a, b: np.maximum(0.0, 1.0 - ((1.0-a)**w + (1.0-b)**w)**(1.0/w)),
+                lambda values, axis: np.maximum(0.0, 1.0 - np.sum((1.0-values)**w, axis=axis)**(1.0/w)), identity=1.0)
+
+def yager_s_norm(w = 2.0) -> Norm:
+    return Norm(f"yager({w})", lambda a, b: np.minimum(1.0, (a**w + b**w)**(1.0/w)),
+                lambda values, axis: np.minimum(1.0, np.sum(values**w, axis=axis)**(1.0/w)), identity=0.0)
+
+T_NORMS = {norm.name: norm for norm in [zadeh_t_norm, product_t_norm, lukasiewicz_t_norm, drastic_t_norm, hamacher_t_norm, einstein_t_norm]}
+S_NORMS = {norm.name: norm for norm in [zadeh_s_norm, probabilistic_s_norm, lukasiewicz_s_norm, drastic_s_norm, hamacher_s_norm, einstein_s_norm]}
+T_NORMS["yager"] = yager_t_norm()
+S_NORMS["yager"] = yager_s_norm()
+
+def register_t_norm(name: str, norm: Norm):
+    T_NORMS[name] = norm
+
+def register_s_norm(name: str, norm: Norm):
+    S_NORMS[name] = norm
+
+#A Norm from a Norm or a name in registry
+def get_norm(norm, registry: dict) -> Norm:
+    if isinstance(norm, str):
+        if norm not in registry:
+            raise ValueError(f"norm {norm} is invalid, use one of {list(registry)}")
+        return registry[norm]
+    return norm
@@ -0,0 +1,289 @@
+import os
+import json
+import zlib
+import struct
+import zipfile
+from math import exp
+import numpy as np
+if __package__:
+    from . import memberships, norms, fis, zadeh_fis
+    from .lookup import LookupTable
+else:
+    import memberships
+    import norms
+    import fis
+    import zadeh_fis
+    from lookup import LookupTable
+
+#Saves fuzzy systems (memberships, rules, rule bases, relations, lookup tables) to one .npz and loads them back
+#without running any of their constructors, the sampled memberships, compiled rule base grids and relations are stored as they are
+#The npz holds a json header (format, version, a crc32 per array and a description of every object) and the arrays it refers to
+#   serialization.save("controller.npz", {"rule_base": fuzzy_rule_base, "table": get_fuzzy_table()})
+#   objects = serialization.load("controller.npz")
+FORMAT = "fuzzy"
+VERSION = 1
+
+#arrays at least this big are memory mapped by load(mmap=True), smaller ones aren't worth a mapping
+MMAP_MIN_BYTES = 1 << 20
+
+#Membership attributes that are rebuilt on load instead of saved
+SKIPPED = {"cache", "cache_hits", "cache_misses", "membership_func"}
+
+#Plain json value for a parameter, numpy scalars become python ones
+def plain(name: str, value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [plain(name, item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise ValueError(f"can't save {name} of type {type(value).__name__}")
+
+#Name of an and_op/t_norm/s_norm, a function from fis.py or a norm in registry
+def operator_name(op, registry: dict) -> str:
+    if isinstance(op, norms.Norm):
+        for name, norm in registry.items():
+            if norm is op:
+                return name
+        raise ValueError(f"norm {op} isn't registered, register it with norms.register_t_norm/register_s_norm to save it")
+    if getattr(fis, getattr(op, "__name__", ""), None) is op:
+        return "fis." + op.__name__
+    raise ValueError(f"operator {op} can't be saved, use a function from fis.py or a registered norm")
+
+def operator(name: str, registry: dict):
+    if name.startswith("fis."):
+        return getattr(fis, name[len("fis."):])
+    return norms.get_norm(name, registry)
+
+#Collects the arrays of everything being saved, objects become json descriptions that refer to their arrays by key
+#Memberships are kept once however many rules share them
+class Writer:
+    def __init__(self):
+        self.arrays = {}
+        self.memberships = []
+        self.membership_idx = {}
+
+    def array(self, value) -> str:
+        key = f"a{len(self.arrays)}"
+        self.arrays[key] = np.ascontiguousarray(value)
+        return key
+
+    def membership(self, mem: memberships.Membership) -> int:
+        if id(mem) not in self.membership_idx:
+            spec = {"class": type(mem).__name__, "params": {}, "arrays": {}}
+            for name, value in vars(mem).items():
+                if name in SKIPPED:
+                    continue
+                if isinstance(value, np.ndarray):
+                    spec["arrays"][name] = self.array(value)
+                else:
+                    spec["params"][name] = plain(name, value)
+            self.membership_idx[id(mem)] = len(self.memberships)
+            self.memberships.append(spec)
+        return self.membership_idx[id(mem)]
+
+    def rule(self, rule: fis.Rule) -> dict:
+        spec = {"anecedents": [self.membership(mem) for mem in rule.anecedent_memberships]}
+        if isinstance(rule, fis.TSKRule):
+            spec["coefficients"] = self.array(rule.coefficients)
+        else:
+            spec["consequent"] = self.membership(rule.consequent)
+        return spec
+
+    #json description of obj, lists and dicts (with str keys) of savable objects are saved item by item
+    def encode(self, obj) -> dict:
+        if isinstance(obj, memberships.Membership):
+            return {"kind": "membership", "index": self.membership(obj)}
+
+        if isinstance(obj, fis.Rule):
+            return {"kind": "rule", **self.rule(obj)}
+
+        if isinstance(obj, fis.RuleBase):
+            return {"kind": "rule_base", "rules": [self.rule(rule) for rule in obj.rules],
+                    "input_idx": [idx.tolist() for idx in obj.input_idx], "n_inputs": obj.n_inputs,
+                    "and_op": operator_name(obj.and_op, norms.T_NORMS), "aggregation_op": obj.aggregation_op,
+                    "t_norm": operator_name(obj.t_norm, norms.T_NORMS), "s_norm": operator_name(obj.s_norm, norms.S_NORMS),
+                    "dx": obj.dx, "batch_size": obj.batch_size,
+                    "arrays": {name: self.array(getattr(obj, name))
+                               for name in ["y", "consequents", "consequent_centroids", "centroid_num", "centroid_den"]}}
+
+        if isinstance(obj, fis.TSKRuleBase):
+            return {"kind": "tsk_rule_base", "rules": [self.rule(rule) for rule in obj.rules],
+                    "input_idx": [idx.tolist() for idx in obj.input_idx], "n_inputs": obj.n_inputs,
+                    "and_op": operator_name(obj.and_op, norms.T_NORMS), "order": obj.order, "batch_size": obj.batch_size,
+                    "coefficients": self.array(obj.coefficients)}
+
+        if isinstance(obj, zadeh_fis.RuleGenerator):
+            spec = {"kind": "rule_generator", "dim": obj.dim, "consequent_domain": plain("consequent_domain", obj.consequent_domain),
+                    "anecedent_domains": [self.array(domain) for domain in obj.anecedent_domains]}
+            R = obj.R_matrix
+            if isinstance(R, zadeh_fis.SparseRelation):
+                spec["sparse"] = {"shape": list(R.shape), "support_idx": [self.array(idx) for idx in R.support_idx],
+                                  "values": self.array(R.values), "default_row": self.array(R.default_row)}
+            else:
+                spec["R_matrix"] = self.array(R)
+            return spec
+
+        if isinstance(obj, LookupTable):
+            return {"kind": "lookup_table", "axes": [self.array(axis) for axis in obj.axes],
+                    "table": self.array(obj.table), "method": obj.method}
+
+        if isinstance(obj, (list, tuple)):
+            return {"kind": "list", "items": [self.encode(item) for item in obj]}
+
+        if isinstance(obj, dict):
+            return {"kind": "dict", "items": {plain("key", key): self.encode(value) for key, value in obj.items()}}
+
+        raise ValueError(f"can't save objects of type {type(obj).__name__}")
+
+#Rebuilds objects from their descriptions, straight into __dict__ so no constructor runs
+class Reader:
+    def __init__(self, header: dict, arrays: dict):
+        self.arrays = arrays
+        self.membership_specs = header["memberships"]
+        self.memberships = [None] * len(self.membership_specs)
+
+    def membership(self, index: int) -> memberships.Membership:
+        if self.memberships[index] is None:
+            spec = self.membership_specs[index]
+            cls = getattr(memberships, spec["class"], None)
+            if not (isinstance(cls, type) and issubclass(cls, memberships.Membership)):
+                raise ValueError(f"membership class {spec['class']} doesn't exist")
+
+            mem = cls.__new__(cls)
+            mem.__dict__.update(spec["params"])
+            mem.__dict__.update({name: self.arrays[key] for name, key in spec["arrays"].items()})
+            mem.cache_hits = 0
+            mem.cache_misses = 0
+            mem.clear_cache()
+            if isinstance(mem, memberships.GaussianMembership):
+                max_value, mean, stddeviation = mem.max_value, mem.mean, mem.stddeviation
+                mem.membership_func = lambda x: max_value*exp(-(x-mean)**2/(2*stddeviation**2))
+            self.memberships[index] = mem
+        return self.memberships[index]
+
+    def rule(self, spec: dict) -> fis.Rule:
+        anecedents = [self.membership(index) for index in spec["anecedents"]]
+        if "coefficients" in spec:
+            return fis.TSKRule(anecedents, self.arrays[spec["coefficients"]])
+        return fis.Rule(anecedents, self.membership(spec["consequent"]))
+
+    def decode(self, spec: dict):
+        match spec["kind"]:
+            case "membership":
+                return self.membership(spec["index"])
+
+            case "rule":
+                return self.rule(spec)
+
+            case "rule_base":
+                rule_base = fis.RuleBase.__new__(fis.RuleBase)
+                rule_base.rules = [self.rule(rule) for rule in spec["rules"]]
+                rule_base.input_idx = [np.asarray(idx, dtype=int) for idx in spec["input_idx"]]
+                rule_base.n_inputs = spec["n_inputs"]
+                rule_base.and_op = operator(spec["and_op"], norms.T_NORMS)
+                rule_base.t_norm = operator(spec["t_norm"], norms.T_NORMS)
+                rule_base.s_norm = operator(spec["s_norm"], norms.S_NORMS)
+                rule_base.aggregation_op = spec["aggregation_op"]
+                rule_base.dx = spec["dx"]
+                rule_base.batch_size = spec["batch_size"]
+                for name, key in spec["arrays"].items():
+                    setattr(rule_base, name, self.arrays[key])
+                return rule_base
+
+            case "tsk_rule_base":
+                rule_base = fis.TSKRuleBase.__new__(fis.TSKRuleBase)
+                rule_base.rules = [self.rule(rule) for rule in spec["rules"]]
+                rule_base.input_idx = [np.asarray(idx, dtype=int) for idx in spec["input_idx"]]
+                rule_base.n_inputs = spec["n_inputs"]
+                rule_base.and_op = operator(spec["and_op"], norms.T_NORMS)
+                rule_base.order = spec["order"]
+                rule_base.batch_size = spec["batch_size"]
+                rule_base.coefficients = self.arrays[spec["coefficients"]]
+                return rule_base
+
+            case "rule_generator":
+                generator = zadeh_fis.RuleGenerator.__new__(zadeh_fis.RuleGenerator)
+                generator.dim = spec["dim"]
+                generator.consequent_domain = spec["consequent_domain"]
+                generator.anecedent_domains = [self.arrays[key] for key in spec["anecedent_domains"]]
+                if "sparse" in spec:
+                    sparse = spec["sparse"]
+                    generator.R_matrix = zadeh_fis.SparseRelation(sparse["shape"], [self.arrays[key] for key in sparse["support_idx"]],
+                                                                  self.arrays[sparse["values"]], self.arrays[sparse["default_row"]])
+                else:
+                    generator.R_matrix = self.arrays[spec["R_matrix"]]
+                return generator
+
+            case "lookup_table":
+                return LookupTable([self.arrays[key] for key in spec["axes"]], self.arrays[spec["table"]], spec["method"])
+
+            case "list":
+                return [self.decode(item) for item in spec["items"]]
+
+            case "dict":
+                return {key: self.decode(item) for key, item in spec["items"].items()}
+
+        raise ValueError(f"object kind {spec['kind']} is invalid")
+
+def checksum(array: np.ndarray) -> int:
+    return zlib.crc32(memoryview(np.ascontiguousarray(array)).cast("B"))
+
+#Saves obj (anything Writer.encode takes) to path, writes then renames so a crash mid save keeps the old file
+def save(path, obj):
+    writer = Writer()
+    root = writer.encode(obj)
+    header = {"format": FORMAT, "version": VERSION, "root": root, "memberships": writer.memberships,
+              "checksums": {key: checksum(array) for key, array in writer.arrays.items()}}
+
+    temp_path = str(path) + ".tmp.npz"
+    np.savez(temp_path, header=np.array(json.dumps(header)), **writer.arrays)
+    os.replace(temp_path, path)
+
+#Array stored uncompressed in the npz as a read only memmap, None if it's compressed
+def mmap_member(path, archive: zipfile.ZipFile, name: str) -> np.memmap:
+    info = archive.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as f:
+        #the data starts after the local file header, whose name and extra field can differ from the central directory's
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran_order else "C")
+
+#Loads what save() wrote
+#mmap - memory map arrays of MMAP_MIN_BYTES or more (read only) instead of reading them, for relations bigger than memory
+#verify - check every array against its checksum, this reads memory mapped arrays through once
+def load(path, mmap = False, verify = True):
+    with np.load(path) as data:
+        header = json.loads(str(data["header"]))
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{path} isn't a saved fuzzy system")
+        if header["version"] > VERSION:
+            raise ValueError(f"{path} is version {header['version']}, this only reads up to version {VERSION}")
+
+        arrays = {}
+        with zipfile.ZipFile(path) as archive:
+            for key in header["checksums"]:
+                if mmap and archive.getinfo(key + ".npy").file_size >= MMAP_MIN_BYTES:
+                    arrays[key] = mmap_member(path, archive, key + ".npy")
+                if arrays.get(key) is None:
+                    arrays[key] = data[key]
+
+    if verify:
+        for key, expected in header["checksums"].items():
+            if checksum(arrays[key]) != expected:
+                raise ValueError(f"{path} is corrupted, array {key} doesn't match its checksum")
+
+    return Reader(header, arrays).decode(header["root"])
@@ -0,0 +1,508 @@
+import pygame
+import time
+import math
+import os
+import collections
+import numpy as np
+
+def scale_image(img: pygame.Surface, factor):
+    size = round(img.get_width() * factor), round(img.get_height() * factor)
+    return pygame.transform.scale(img, size)
+
+#Rotated copies of an image (and their masks) for every angle, rounded to bin_degrees, made the first time they're asked for
+#The least recently used angles are dropped once the copies take up more than max_bytes
+class RotationCache:
+    def __init__(self, image, bin_degrees = 1.0, max_bytes = 16*1024*1024):
+        self.image = image
+        self.bin_degrees = bin_degrees
+        self.max_bytes = max_bytes
+        self.n_bins = max(int(round(360 / bin_degrees)), 1)
+        self.rotations = collections.OrderedDict()
+        self.nbytes = 0
+
+    #Returns (rotated image, its mask, offset of its top left from the unrotated image's top left)
+    def get(self, angle):
+        angle_bin = int(round(angle / self.bin_degrees)) % self.n_bins
+        if angle_bin in self.rotations:
+            self.rotations.move_to_end(angle_bin)
+            return self.rotations[angle_bin]
+
+        rotated_image = pygame.transform.rotate(self.image, angle_bin * self.bin_degrees)
+        # Take rotated image and put it at center of old image
+        offset = rotated_image.get_rect(center=self.image.get_rect().center).topleft
+        rotation = (rotated_image, pygame.mask.from_surface(rotated_image), offset)
+
+        self.rotations[angle_bin] = rotation
+        self.nbytes += self.entry_bytes(rotated_image)
+        while self.nbytes > self.max_bytes and len(self.rotations) > 1:
+            _, (old_image, _, _) = self.rotations.popitem(last=False)
+            self.nbytes -= self.entry_bytes(old_image)
+
+        return rotation
+
+    #pixels plus one bit a pixel for the mask
+    @staticmethod
+    def entry_bytes(image) -> int:
+        return image.get_width() * image.get_height() * (image.get_bytesize() + 1/8)
+
+#One RotationCache per image, shared by every car that uses it
+ROTATION_CACHES = {}
+def rotation_cache(image) -> RotationCache:
+    if id(image) not in ROTATION_CACHES:
+        ROTATION_CACHES[id(image)] = RotationCache(image)
+    return ROTATION_CACHES[id(image)]
+
+def blit_rotate_center(win, image, top_left, angle):
+    # This rotates around the center, rotations come out of the cache
+    rotated_image, _, offset = rotation_cache(image).get(angle)
+    win.blit(rotated_image, (top_left[0] + offset[0], top_left[1] + offset[1]))
+
+#Images are loaded relative to this file so the simulation can be imported from anywhere, no window is needed
+IMGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imgs")
+def load_image(name):
+    return pygame.image.load(os.path.join(IMGS, name))
+
+DESERT = scale_image(load_image("desert.png"), 2)
+TRACK_SCALE_FACTOR = 0.7
+TRACK = scale_image(load_image("track.png"), TRACK_SCALE_FACTOR)
+TRACK_BORDER = scale_image(load_image("track-border.png"), TRACK_SCALE_FACTOR)
+TRACK_BORDER_MASK = pygame.mask.from_surface(TRACK_BORDER)
+
+INNER_TRACK_BORDER = scale_image(load_image("inner-track-border.png"), TRACK_SCALE_FACTOR)
+INNER_TRACK_BORDER_MASK = pygame.mask.from_surface(INNER_TRACK_BORDER)
+
+OUTER_TRACK_BORDER = scale_image(load_image("outer-track-border.png"), TRACK_SCALE_FACTOR)
+OUTER_TRACK_BORDER_MASK = pygame.mask.from_surface(OUTER_TRACK_BORDER)
+
+FINISH = load_image("finish.png")
+FINISHMASK = pygame.mask.from_surface(FINISH)
+
+CAR_SCALE_FACTOR = 0.5
+RED_CAR = scale_image(load_image("red-car.png"), CAR_SCALE_FACTOR)
+
+WIDTH, HEIGHT = TRACK.get_width(), TRACK.get_height()
+IMAGES = [(DESERT, (0, 0)), (TRACK, (0, 0)), (FINISH, (88, 250))]
+
+FPS = 60
+
+#Every offset the image can't be put at without overlapping mask, worked out once per (mask, image) with a mask convolution
+#Returns (grid, pad_x, pad_y, image mask), grid is a bool array indexed [x + pad_x, y + pad_y], offsets off the grid never overlap
+COLLISION_GRIDS = {}
+def collision_grid(mask, img):
+    key = (id(mask), id(img))
+    if key not in COLLISION_GRIDS:
+        img_mask = pygame.mask.from_surface(img)
+        overlaps = mask.convolve(img_mask).to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 255))
+        grid = pygame.surfarray.array_red(overlaps) > 0
+        width, height = img_mask.get_size()
+        #mask and img are kept in here too so their ids can't be reused while cached
+        COLLISION_GRIDS[key] = (grid, width - 1, height - 1, img_mask, mask, img)
+    return COLLISION_GRIDS[key][:4]
+
+#Rays for many cars at once, x and y are (cars,), step_x and step_y are each ray's unit step (cars, rays)
+#Returns the offset each ray stopped at (cars, rays, 2) and whether it hit the wall (cars, rays)
+def march_rays(x, y, step_x, step_y, mask, img, max_length):
+    grid, pad_x, pad_y, _ = collision_grid(mask, img)
+
+    #cumsum adds the steps up one at a time, the same way cast_ray moves x and y
+    steps = np.empty(step_x.shape + (max_length + 1, 2))
+    steps[:, :, 0, 0] = x[:, None]
+    steps[:, :, 0, 1] = y[:, None]
+    steps[:, :, 1:, 0] = step_x[:, :, None]
+    steps[:, :, 1:, 1] = step_y[:, :, None]
+    offsets = np.cumsum(steps, axis=2)[:, :, 1:].astype(int)
+
+    grid_x, grid_y = offsets[..., 0] + pad_x, offsets[..., 1] + pad_y
+    on_grid = (grid_x >= 0) & (grid_x < grid.shape[0]) & (grid_y >= 0) & (grid_y < grid.shape[1])
+    hits = np.zeros(grid_x.shape, dtype=bool)
+    hits[on_grid] = grid[grid_x[on_grid], grid_y[on_grid]]
+
+    first_hit = np.argmax(hits, axis=2)
+    return np.take_along_axis(offsets, first_hit[:, :, None, None], axis=2)[:, :, 0], hits.any(axis=2)
+
+class Car:
+    IMG = RED_CAR
+    START_POS = (140, 200)
+
+    def __init__(self, max_vel, rotation_vel) -> None:
+        self.img = self.IMG
+        self.max_vel = max_vel
+        self.vel = 0
+        self.rotational_vel = rotation_vel
+        self.angle = 0
+        self.x, self.y = self.START_POS
+        self.acceleration = 0.1
+        self.rewardgate = 0
+        self.gameScore = 0
+    
+    def reset(self):
+        self.vel = 0
+        self.angle = 0
+        self.x, self.y = self.START_POS
+        self.gameScore = 0
+        
+    
+    def rotate(self, left=False, right=False, rotational_vel = None):
+        if rotational_vel is None:
+            rotational_vel = self.rotational_vel
+
+        if left:
+            self.angle += rotational_vel
+        elif right:
+            self.angle -= rotational_vel
+        else:
+            self.angle += rotational_vel
+    
+    def draw(self, win):
+        blit_rotate_center(win, self.img, (self.x, self.y), self.angle)
+        self.draw_rays(win,self,TRACK_BORDER_MASK,100)
+    
+    def move(self):
+        radians = math.radians(self.angle)
+        vertical = self.vel * math.cos(radians) 
+        horizontal = self.vel * math.sin(radians) 
+        # Weird reasons for subtracting (just trust)
+        self.x -= horizontal
+        self.y -= vertical
+    
+    def move_forward(self):
+        self.vel = min(self.vel + self.acceleration, self.max_vel)
+    
+    def move_backward(self):
+        self.vel = max(self.vel - self.acceleration, -self.max_vel/2)
+    
+    def reduce_speed(self):
+        if(self.vel >= 0):
+            self.vel = max(self.vel - self.acceleration/2, 0)
+        else:
+            self.vel = min(self.vel + self.acceleration, 0)
+    
+    # Takes mask of object car could collide with (TRACK_BORDER_MASK) and its coordinates
+    #The car's mask is rotated to its heading (from the rotation cache)
+    def car_collide(self, mask, x=0, y=0):
+        _, car_mask, rotation_offset = rotation_cache(self.img).get(self.angle)
+        offset = (int(self.x + rotation_offset[0] - x), int(self.y + rotation_offset[1] - y))
+        poi = mask.overlap(car_mask, offset)
+        # If poi (point of intersction) is none, no collision occured
+        return poi
+    
+    #Gets the point of intersection between the car and the track border in four directions and returns those coordinates for each direction.
+    def getWallPointOfIntersection(self,mask,x=0,y=0):
+        _, car_mask, rotation_offset = rotation_cache(self.img).get(self.angle)
+        offset = [int(self.x + rotation_offset[0] - x), int(self.y + rotation_offset[1] - y)]
+        rightpoi = None
+        leftpoi = None
+        frontpoi = None
+        rearpoi = None
+        while(rightpoi == None):
+            offset[0] +=1
+            rightpoi = mask.overlap(car_mask,offset)
+        while(leftpoi == None):
+            offset[0] -=1
+            leftpoi = mask.overlap(car_mask,offset)
+        while(frontpoi == None):
+            offset[0] = self.x
+            offset[1] -=1
+            frontpoi = mask.overlap(car_mask,offset)
+        while(rearpoi == None):
+            offset[0] = self.x
+            offset[1] +=1
+            rearpoi = mask.overlap(car_mask,offset)
+        return rightpoi,leftpoi,frontpoi,rearpoi
+
+    def bounce(self):
+        self.vel = -self.vel
+    
+    def correctDirection(self):
+        ray_length = 50
+        
+        correct_right_ray = self.cast_ray(0,OUTER_TRACK_BORDER_MASK,ray_length)
+        correct_left_ray = self.cast_ray(math.pi,INNER_TRACK_BORDER_MASK,ray_length)
+        wrong_right_ray = self.cast_ray(0,INNER_TRACK_BORDER_MASK,ray_length)
+        wrong_left_ray = self.cast_ray(math.pi,OUTER_TRACK_BORDER_MASK,ray_length)
+        
+        if not correct_right_ray and wrong_right_ray:
+            return 0
+        
+        if not correct_left_ray and wrong_left_ray:
+            return 0
+        
+        return 1
+    
+    def distance_to_point(self, point):
+        return math.sqrt((self.x - point[0]) ** 2 + (self.y - point[1]) ** 2)
+
+    #Steps every ray in directions (same angles as cast_ray) a pixel at a time like cast_ray, but all at once
+    #and checks each step against the precomputed collision grid instead of overlapping masks
+    #Rays probe with the upright car image, that way there is one collision grid per mask rather than one per heading
+    #Returns the offset each ray stopped at (N, 2) and whether it hit the wall (N,)
+    def march_rays(self, directions, mask, max_length):
+        initDirection = 90
+        radians = math.radians(self.angle + initDirection)
+        step_x = np.array([[math.sin(radians + direction) for direction in directions]])
+        step_y = np.array([[math.cos(radians + direction) for direction in directions]])
+
+        offsets, hits = march_rays(np.array([self.x]), np.array([self.y]), step_x, step_y, mask, self.img, max_length)
+        return offsets[0], hits[0]
+
+    #Distance to the wall along every direction, max_length if it is further than that
+    def ray_distances(self, directions, mask, max_length):
+        offsets, hit = self.march_rays(directions, mask, max_length)
+        distances = np.sqrt((self.x - offsets[:, 0]) ** 2 + (self.y - offsets[:, 1]) ** 2)
+        return np.where(hit, distances, max_length)
+
+    #n_rays spread evenly from the right (0) through the front (pi/2) to the left (pi)
+    def wall_distance_fan(self, n_rays = 16, max_length = 100):
+        return self.ray_distances(np.linspace(0, math.pi, n_rays), TRACK_BORDER_MASK, max_length)
+
+    def cast_ray(self, direction, mask, max_length):
+        return self.cast_rays(mask, max_length, [direction])[0]
+    
+    #Returns (offset, point of intersection, distance) or None for each direction, right, left and front by default
+    def cast_rays(self, mask, max_length, directions = (0, math.pi, math.pi / 2)):
+        offsets, hit = self.march_rays(directions, mask, max_length)
+        _, _, _, car_mask = collision_grid(mask, self.img)
+
+        rays = []
+        for i in range(len(directions)):
+            if not hit[i]:
+                rays.append(None)
+                continue
+            offset = (int(offsets[i, 0]), int(offsets[i, 1]))
+            rays.append((offset, mask.overlap(car_mask, offset), self.distance_to_point(offset)))
+
+        return tuple(rays)
+    
+    def draw_rays(self,win, car, mask, max_length):
+        rays = self.cast_rays(mask, max_length)
+        i = 0
+        for ray in rays:
+            color = (255,0,0)
+            if ray:
+                # Draw the ray from the car's position to the point of intersection
+                if i == 3:
+                    color = (0,255,0)
+                pygame.draw.line(win, color, (car.x + 10, car.y + 10), ray[0], 2)
+            i += 1
+
+    def getWallDistances(self):
+        #right, left and front, int() of the distance like the rays always did
+        return np.floor(self.ray_distances((0, math.pi, math.pi / 2), TRACK_BORDER_MASK, 100))
+
+def draw(win, images, car):
+    for img, pos in images:
+        win.blit(img, pos)
+    
+    car.draw(win)
+
+#Applies an action to the car
+#action - (rotational velocity, throttle), positive rotation turns left, 0 doesn't turn
+#throttle - 1 speeds up, -1 reverses, 0 slows down, None keeps the current speed
+def apply_action(car, action):
+    rotational_vel, throttle = action
+
+    if rotational_vel:
+        car.rotate(rotational_vel = rotational_vel)
+
+    if throttle == 1:
+        car.move_forward()
+    elif throttle == -1:
+        car.move_backward()
+    elif throttle == 0:
+        car.reduce_speed()
+
+#Actions (see apply_action) for an (N,) array of controller outputs, one row per car for BatchSimulation.step
+#an output that rounds to 0 drives straight ahead, one of at least 1 turns by -output and keeps the speed, anything else slows down
+def actions_from_outputs(result) -> np.ndarray:
+    result = np.asarray(result, dtype=float)
+    actions = np.zeros((len(result), 2))
+    straight = np.round(result) == 0
+    turning = ~straight & (np.abs(result) >= 1.0)
+    actions[:, 0] = np.where(turning, -result, 0)
+    actions[:, 1] = np.where(straight, 1, np.where(turning, np.nan, 0))
+    return actions
+
+#Game without the event loop, each step is one frame of the game at FPS
+#Steps are fixed size and don't look at the clock, so the same actions always give the same run
+#render - draw every step to a window, fps - throttle to that many steps a second (None runs as fast as possible)
+class Simulation:
+    def __init__(self, car = None, render = False, fps = None):
+        self.car = car if car is not None else Car(3, 4)
+        self.render = render
+        self.fps = fps
+        self.clock = pygame.time.Clock() if fps is not None else None
+        self.win = pygame.display.set_mode((WIDTH, HEIGHT)) if render else None
+        self.frame = 0
+        self.steps_per_second = 0.0
+
+    def reset(self):
+        self.car.reset()
+        self.frame = 0
+
+    #seconds of game time that have passed
+    @property
+    def time(self) -> float:
+        return self.frame / FPS
+
+    #Advances one frame, action is applied first if given (see apply_action)
+    #Returns whether the car hit the track border this frame
+    def step(self, action = None) -> bool:
+        if self.clock is not None:
+            self.clock.tick(self.fps)
+
+        if action is not None:
+            apply_action(self.car, action)
+
+        if self.render:
+            draw(self.win, IMAGES, self.car)
+            pygame.display.flip()
+
+        collided = self.car.car_collide(TRACK_BORDER_MASK) != None
+        if collided:
+            self.car.bounce()
+
+        self.car.move()
+        self.frame += 1
+        return collided
+
+    #Runs n_steps with controller(car) -> action, records how many steps a second it managed
+    def run(self, controller, n_steps: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            self.step(controller(self.car))
+        self.steps_per_second = n_steps / max(time.perf_counter() - start, 1e-12)
+        return self.steps_per_second
+
+#collision_grid for every heading of the image, bit packed since there is one per RotationCache bin
+#A bin's grid is only made the first time a car points that way
+class RotatedCollisionGrids:
+    def __init__(self, mask, img, bin_degrees = 1.0):
+        self.mask = mask
+        self.rotations = RotationCache(img, bin_degrees, max_bytes=math.inf)
+        self.n_bins = self.rotations.n_bins
+
+        #any rotation of the image fits inside its diagonal
+        self.pad = math.ceil(math.hypot(*img.get_size())) + 1
+        width, height = mask.get_size()
+        self.shape = (width + 2*self.pad, height + 2*self.pad)
+        #packed grids of the bins built so far, a bin only gets a slot when a car first points that way
+        #the stack doubles when it's full, so it stays within twice the bins in use while lookups are still one gather
+        self.grids = np.zeros((0, self.shape[0], math.ceil(self.shape[1] / 8)), dtype=np.uint8)
+        self.slots = np.full(self.n_bins, -1, dtype=int)
+        self.n_built = 0
+        self.offsets = np.zeros((self.n_bins, 2), dtype=int)
+
+    def bins(self, angles) -> np.ndarray:
+        return np.round(angles / self.rotations.bin_degrees).astype(int) % self.n_bins
+
+    def build(self, angle_bin):
+        _, rotated_mask, offset = self.rotations.get(angle_bin * self.rotations.bin_degrees)
+        overlaps = self.mask.convolve(rotated_mask).to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 255))
+        grid = pygame.surfarray.array_red(overlaps) > 0
+
+        #convolve puts offset (u, v) at (u + width - 1, v + height - 1), move it to (u + pad, v + pad)
+        width, height = rotated_mask.get_size()
+        canvas = np.zeros(self.shape, dtype=bool)
+        start_x, start_y = self.pad - (width - 1), self.pad - (height - 1)
+        canvas[start_x:start_x + grid.shape[0], start_y:start_y + grid.shape[1]] = grid
+
+        if self.n_built == len(self.grids):
+            grown = np.zeros((min(max(2 * len(self.grids), 1), self.n_bins),) + self.grids.shape[1:], dtype=np.uint8)
+            grown[:self.n_built] = self.grids
+            self.grids = grown
+        self.grids[self.n_built] = np.packbits(canvas, axis=1)
+        self.slots[angle_bin] = self.n_built
+        self.n_built += 1
+        self.offsets[angle_bin] = offset
+
+    #Same answer as car_collide for cars with top left (x, y) pointing at angles
+    def collide(self, x, y, angles) -> np.ndarray:
+        bins = self.bins(angles)
+        for angle_bin in np.unique(bins[self.slots[bins] < 0]):
+            self.build(angle_bin)
+
+        grid_x = (x + self.offsets[bins, 0]).astype(int) + self.pad
+        grid_y = (y + self.offsets[bins, 1]).astype(int) + self.pad
+        on_grid = (grid_x >= 0) & (grid_x < self.shape[0]) & (grid_y >= 0) & (grid_y < self.shape[1])
+
+        collided = np.zeros(len(bins), dtype=bool)
+        packed = self.grids[self.slots[bins[on_grid]], grid_x[on_grid], grid_y[on_grid] >> 3]
+        collided[on_grid] = (packed >> (7 - (grid_y[on_grid] & 7))) & 1 == 1
+        return collided
+
+ROTATED_COLLISION_GRIDS = {}
+def rotated_collision_grids(mask, img) -> RotatedCollisionGrids:
+    key = (id(mask), id(img))
+    if key not in ROTATED_COLLISION_GRIDS:
+        ROTATED_COLLISION_GRIDS[key] = RotatedCollisionGrids(mask, img)
+    return ROTATED_COLLISION_GRIDS[key]
+
+#n_cars cars stepped together, every car's state is one entry of a numpy array instead of a Car
+#Same physics as Car and Simulation.step, actions is (n_cars, 2) of (rotational velocity, throttle) like apply_action
+#with throttle nan keeping the current speed
+#score is how far each car has driven forward, collisions how many times it hit the border
+class BatchSimulation:
+    def __init__(self, n_cars: int, max_vel = 3, rotation_vel = 4, img = RED_CAR, start_pos = Car.START_POS):
+        self.n_cars = n_cars
+        self.max_vel = max_vel
+        self.rotational_vel = rotation_vel
+        self.acceleration = 0.1
+        self.img = img
+        self.start_pos = start_pos
+        self.collision_grids = rotated_collision_grids(TRACK_BORDER_MASK, img)
+        self.steps_per_second = 0.0
+        self.reset()
+
+    def reset(self):
+        self.x = np.full(self.n_cars, float(self.start_pos[0]))
+        self.y = np.full(self.n_cars, float(self.start_pos[1]))
+        self.angle = np.zeros(self.n_cars)
+        self.vel = np.zeros(self.n_cars)
+        self.score = np.zeros(self.n_cars)
+        self.collisions = np.zeros(self.n_cars, dtype=int)
+        self.frame = 0
+
+    #(n_cars, len(directions)) wall distances, same as Car.ray_distances
+    def ray_distances(self, directions, mask = TRACK_BORDER_MASK, max_length = 100) -> np.ndarray:
+        initDirection = 90
+        radians = np.radians(self.angle + initDirection)[:, None] + np.asarray(directions, dtype=float)[None]
+
+        offsets, hits = march_rays(self.x, self.y, np.sin(radians), np.cos(radians), mask, self.img, max_length)
+        distances = np.sqrt((self.x[:, None] - offsets[..., 0]) ** 2 + (self.y[:, None] - offsets[..., 1]) ** 2)
+        return np.where(hits, distances, max_length)
+
+    #right, left and front like Car.getWallDistances, (n_cars, 3)
+    def wall_distances(self) -> np.ndarray:
+        return np.floor(self.ray_distances((0, math.pi, math.pi / 2)))
+
+    #Advances every car one frame, returns which cars hit the track border
+    def step(self, actions = None) -> np.ndarray:
+        if actions is not None:
+            actions = np.asarray(actions, dtype=float)
+            rotational_vel, throttle = actions[:, 0], actions[:, 1]
+            self.angle += rotational_vel
+
+            forward, backward, coast = throttle == 1, throttle == -1, throttle == 0
+            self.vel = np.where(forward, np.minimum(self.vel + self.acceleration, self.max_vel), self.vel)
+            self.vel = np.where(backward, np.maximum(self.vel - self.acceleration, -self.max_vel/2), self.vel)
+            slowed = np.where(self.vel >= 0, np.maximum(self.vel - self.acceleration/2, 0), np.minimum(self.vel + self.acceleration, 0))
+            self.vel = np.where(coast, slowed, self.vel)
+
+        collided = self.collision_grids.collide(self.x, self.y, self.angle)
+        self.vel = np.where(collided, -self.vel, self.vel)
+        self.collisions += collided
+
+        radians = np.radians(self.angle)
+        self.x -= self.vel * np.sin(radians)
+        self.y -= self.vel * np.cos(radians)
+        self.score += np.maximum(self.vel, 0)
+        self.frame += 1
+        return collided
+
+    #Runs n_steps with controller(batch) -> (n_cars, 2) actions, records frames (of every car) a second
+    def run(self, controller, n_steps: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            self.step(controller(self))
+        self.steps_per_second = n_steps / max(time.perf_counter() - start, 1e-12)
+        return self.steps_per_second
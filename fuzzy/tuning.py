@@ -0,0 +1,167 @@
+import numpy as np
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+if __package__:
+    from .memberships import ParametricGaussianMembership, ParametricTrapizoidalMembership
+    from .fis import Rule, RuleBase
+else:
+    from memberships import ParametricGaussianMembership, ParametricTrapizoidalMembership
+    from fis import Rule, RuleBase
+
+#The GA operators are the ones in evolution/ea.py, imported as evolution.ea when tune() needs them
+#run from inside fuzzy/ the repository root isn't on sys.path, so it's put there only for the import
+def import_ea():
+    try:
+        from evolution import ea
+    except ImportError:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        sys.path.insert(0, root)
+        try:
+            from evolution import ea
+        finally:
+            sys.path.remove(root)
+    return ea
+
+#Evolves the membership parameters of the game's fuzzy controller, fitness is a headless lap in the simulator
+#Chromosome (same rules as game.py, the hand tuned values are the defaults):
+#   0 - close_to_front trapezoid right corner  (50)
+#   1 - close_to_front trapezoid max value     (60)
+#   2 - close_to_left gaussian stddeviation    (20)
+#   3 - close_to_right gaussian stddeviation   (20)
+#   4 - turn trapezoid outer corner            (5)
+#   5 - turn trapezoid inner edge              (0.5)
+#   6 - keep_straight gaussian stddeviation    (0.5)
+GENE_NAMES = ["front_corner", "front_max", "left_stddev", "right_stddev", "turn_corner", "turn_edge", "straight_stddev"]
+GENE_MIN = np.array([1.0, 1.0, 1.0, 1.0, 0.5, 0.0, 0.05])
+GENE_MAX = np.array([99.0, 100.0, 60.0, 60.0, 9.5, 5.0, 3.0])
+HAND_TUNED = np.array([50.0, 60.0, 20.0, 20.0, 5.0, 0.5, 0.5])
+
+distance_min = 0
+distance_max = 100
+max_rot_vel = 10.0
+
+#Clips genes into their bounds and keeps every trapezoid's points in order
+def repair(genes: np.ndarray) -> np.ndarray:
+    genes = np.clip(genes, GENE_MIN, GENE_MAX)
+    genes[..., 0], genes[..., 1] = np.minimum(genes[..., 0], genes[..., 1]), np.maximum(genes[..., 0], genes[..., 1])
+    genes[..., 5], genes[..., 4] = np.minimum(genes[..., 4], genes[..., 5]), np.maximum(genes[..., 4], genes[..., 5])
+    return genes
+
+#The game's rule base with the memberships from a chromosome
+def build_controller(genes) -> RuleBase:
+    front_corner, front_max, left_stddev, right_stddev, turn_corner, turn_edge, straight_stddev = repair(np.array(genes, dtype=float))
+
+    close_to_front = ParametricTrapizoidalMembership(distance_min, distance_max, [0, 0, front_corner, front_max], x_step=0.5)
+    close_to_left = ParametricGaussianMembership(distance_min, distance_max, 0, left_stddev)
+    close_to_right = ParametricGaussianMembership(distance_min, distance_max, 0, right_stddev)
+
+    turn_right = ParametricTrapizoidalMembership(-max_rot_vel, max_rot_vel, [-max_rot_vel, -max_rot_vel, -turn_corner, -turn_edge], x_step=0.5)
+    turn_left = ParametricTrapizoidalMembership(-max_rot_vel, max_rot_vel, [turn_edge, turn_corner, max_rot_vel, max_rot_vel], x_step=0.5)
+    keep_straight = ParametricGaussianMembership(-max_rot_vel, max_rot_vel, 0, straight_stddev)
+
+    rules = [Rule([close_to_left, close_to_front], turn_right),
+             Rule([close_to_right, close_to_front], turn_left),
+             Rule([close_to_right.yager_compliment(), close_to_left.yager_compliment(), close_to_front.yager_compliment()], keep_straight)]
+    return RuleBase(rules, input_idx=[[0, 2], [1, 2], [0, 1, 2]], aggregation_op="max_min", dx=0.1)
+
+#Drives one car for n_steps frames with the chromosome's controller
+#Fitness is how far it drove forward minus collision_penalty for every time it hit the border
+def lap_fitness(genes, n_steps = 1200, collision_penalty = 50.0) -> float:
+    if __package__:
+        from .simulation import BatchSimulation, actions_from_outputs
+    else:
+        from simulation import BatchSimulation, actions_from_outputs
+
+    controller = build_controller(genes)
+    sim = BatchSimulation(1)
+    for _ in range(n_steps):
+        sim.step(actions_from_outputs(controller.infer(sim.wall_distances())))
+
+    return float(sim.score[0] - collision_penalty * sim.collisions[0])
+
+#GA parameters for ea's operators, ea minimizes so they are given the negated fitness
+TOURNAMENT_SIZE = 3
+UNDX_PARAMS = [1, 0.5, 0.35/np.sqrt(2)] #one child per set of parents, sigma_1, sigma_2
+MUTATION_SIGMA = 0.1 #as a fraction of each gene's range
+
+#numpy's global generator state goes in too, so a resumed run draws the same numbers an uninterrupted one would
+def save_checkpoint(path, generation: int, pop: np.ndarray, fitness: np.ndarray, best_history: list):
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    #write then rename, so a run killed mid save keeps the last good checkpoint
+    temp_path = path + ".tmp.npz"
+    np.savez(temp_path, generation=generation, population=pop, fitness=fitness, best_history=np.array(best_history),
+             rng_keys=keys, rng_pos=pos, rng_has_gauss=has_gauss, rng_cached_gaussian=cached_gaussian)
+    os.replace(temp_path, path)
+
+def load_checkpoint(path) -> (int, np.ndarray, np.ndarray, list):
+    with np.load(path) as data:
+        np.random.set_state(("MT19937", data["rng_keys"], int(data["rng_pos"]), int(data["rng_has_gauss"]), float(data["rng_cached_gaussian"])))
+        return int(data["generation"]), data["population"], data["fitness"], data["best_history"].tolist()
+
+#Evolves pop_size controllers for n_gen generations, every generation's fitness evaluations are spread over n_workers processes
+#checkpoint - .npz the population is saved to after every generation and resumed from if it already exists,
+#a resumed run continues exactly like one that was never stopped, its population has to be pop_size
+#Returns (best chromosome, its fitness, best fitness of every generation)
+def tune(pop_size = 20, n_gen = 10, n_workers = None, n_steps = 1200, mutation_rate = 0.2, checkpoint = None, seed = None, verbose = True):
+    ea = import_ea()
+    #ea's operators draw from numpy's global generator
+    if seed is not None:
+        np.random.seed(seed)
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        generation, pop, fitness, best_history = load_checkpoint(checkpoint)
+        if len(pop) != pop_size:
+            raise ValueError(f"checkpoint {checkpoint} has a population of {len(pop)}, not {pop_size}")
+        start_gen = generation + 1
+    else:
+        start_gen = 0
+        pop = repair(ea.uniform_random_init(pop_size, len(GENE_MIN), [GENE_MIN, GENE_MAX]))
+        pop[0] = HAND_TUNED
+        fitness = None
+        best_history = []
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        def evaluate(pop):
+            return np.array(list(pool.map(lap_fitness, pop, [n_steps] * len(pop), chunksize=1)))
+
+        if fitness is None:
+            fitness = evaluate(pop)
+
+        for generation in range(start_gen, n_gen):
+            start = time.perf_counter()
+
+            #elitism, the best one always makes it through untouched
+            selected = ea.tournament_selection(-fitness, generation, [3 * (len(pop) - 1), TOURNAMENT_SIZE], elitism=False)
+            children = ea.undx_cross(pop, selected, pop.shape[1], UNDX_PARAMS, n_children=len(pop) - 1)
+            children = repair(ea.normal_dis_mutation(children, mutation_rate, [MUTATION_SIGMA * (GENE_MAX - GENE_MIN)]))
+
+            best = np.argmax(fitness)
+            pop = np.concatenate([pop[best][None], children])
+            fitness = np.concatenate([fitness[best][None], evaluate(children)])
+            best_history.append(float(np.max(fitness)))
+
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, generation, pop, fitness, best_history)
+            if verbose:
+                print(f"generation {generation}: best {np.max(fitness):.2f}, avg {np.mean(fitness):.2f}, {time.perf_counter()-start:.2f}s")
+
+    best = np.argmax(fitness)
+    return pop[best], fitness[best], best_history
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the game's fuzzy memberships with a GA")
+    parser.add_argument("--pop-size", type=int, default=20)
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--steps", type=int, default=1200)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    genes, fitness, _ = tune(args.pop_size, args.generations, args.workers, args.steps, checkpoint=args.checkpoint, seed=args.seed)
+    print(f"best fitness {fitness:.2f}")
+    for name, value in zip(GENE_NAMES, genes):
+        print(f"{name} = {value:.3f}")
@@ -1,95 +1,180 @@
-from memberships import Membership
-from util import min, max
 import numpy as np
-from fis import zadeh_and, product_and
+import functools
+if __package__:
+    from .memberships import Membership
+    from .fis import zadeh_and, product_and
+else:
+    from memberships import Membership
+    from fis import zadeh_and, product_and
 
 #Implication Operators
+#Work on plain floats or on numpy arrays that broadcast against each other, so a whole relation is one call
 def corr_min(anecedent_memberships: [float], consequent_membership: float) -> float:
-    return min(anecedent_memberships + [consequent_membership])
+    return functools.reduce(np.minimum, anecedent_memberships + [consequent_membership])
 
 def corr_product(anecedent_memberships: [float], consequent_membership: float) -> float:
-    product = 1.0
-    membership_values = anecedent_memberships + [consequent_membership]
-    for n in membership_values:
-        product *= n
-    return product
+    return functools.reduce(np.multiply, anecedent_memberships + [consequent_membership])
 
 def lukasiewicz(anecedent_memberships: [float], consequent_membership: float) -> float:
-    return min([1, 1 - min(anecedent_memberships) + consequent_membership])
+    return np.minimum(1, 1 - functools.reduce(np.minimum, anecedent_memberships) + consequent_membership)
 
 def classical(anecedent_memberships: [float], consequent_membership: float) -> float:
-    return max([consequent_membership, 1-min(anecedent_memberships)])
+    return np.maximum(consequent_membership, 1 - functools.reduce(np.minimum, anecedent_memberships))
 
-#Only accepts up to three anecedent memberships; must have at least 1
+#Compositions for RuleGenerator.evaluate, the t-norm that is applied before taking the sup
+COMPOSITIONS = {
+    "sup_min": np.minimum,
+    "sup_product": np.multiply,
+}
+
+#Implications RuleGenerator can be given by name, add your own with register_implication
+#An implication takes a list of anecedent membership arrays and a consequent membership array and has to broadcast them
+IMPLICATIONS = {
+    "corr_min": corr_min,
+    "corr_product": corr_product,
+    "lukasiewicz": lukasiewicz,
+    "classical": classical,
+}
+
+def register_implication(name: str, implication):
+    IMPLICATIONS[name] = implication
+
+#Relation that only stores the box where every anecedent is nonzero (the joint support)
+#Outside of it at least one anecedent is zero, so every row there is the same default_row
+#That holds for all the built in implications, a registered one has to agree to use storage="sparse"
+class SparseRelation:
+    def __init__(self, shape: [int], support_idx: [np.ndarray], values: np.ndarray, default_row: np.ndarray):
+        self.shape = tuple(shape)
+        self.support_idx = support_idx
+        self.values = values
+        self.default_row = default_row
+        self.dtype = values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.default_row.nbytes
+
+    def todense(self) -> np.ndarray:
+        dense = np.empty(self.shape, dtype=self.dtype)
+        dense[...] = self.default_row
+        dense[np.ix_(*self.support_idx)] = self.values
+        return dense
+
+#Any number of anecedent memberships; must have at least 1
 #All domains must consist of singleton inputs
+#storage - "dense" (np array), "sparse" (SparseRelation) or "memmap" (np.memmap backed by the file at path)
+#dtype - precision R_matrix is kept in, np.float32/np.float16 halve/quarter the memory
+#chunk_size - how many values of the first anecedent are built at once, bounds the temporary memory
 class RuleGenerator:
-    def __init__(self, anecedent_mem_func: [Membership], consequent_mem_func: Membership, impliction = corr_min):
+    def __init__(self, anecedent_mem_func: [Membership], consequent_mem_func: Membership, impliction = corr_min,
+                 storage = "dense", dtype = np.float64, path = None, chunk_size = None):
+        if isinstance(impliction, str):
+            name = impliction
+            impliction = IMPLICATIONS.get(name)
+            if impliction is None:
+                raise ValueError(f"implication {name} is invalid, choose from {list(IMPLICATIONS)}")
+
         self.dim = len(anecedent_mem_func)
+        self.anecedent_domains = [np.asarray(mem_func.get_input_range(), dtype=float) for mem_func in anecedent_mem_func]
         self.consequent_domain = [consequent_mem_func.x_min, consequent_mem_func.x_max, consequent_mem_func.x_step]
 
-        if self.dim == 1:
-            self.R_matrix = np.zeros((len(anecedent_mem_func[0].get_input_range()), 
-                                      len(consequent_mem_func.get_input_range())))
-
-            for x in range(len(anecedent_mem_func[0].get_input_range())):
-                for y in range(len(consequent_mem_func.get_input_range())):
-                    self.R_matrix[x][y] = impliction([anecedent_mem_func[0].membership[x]], consequent_mem_func.membership[y])
-        elif self.dim == 2:
-            self.R_matrix = np.zeros((len(anecedent_mem_func[0].get_input_range()), 
-                                      len(anecedent_mem_func[1].get_input_range()),
-                                      len(consequent_mem_func.get_input_range())))
-
-            for x1 in range(len(anecedent_mem_func[0].get_input_range())):
-                for x2 in range(len(anecedent_mem_func[1].get_input_range())):
-                    for y in range(len(consequent_mem_func.get_input_range())):
-                        self.R_matrix[x1][x2][y] = impliction([anecedent_mem_func[0].membership[x1],
-                                                               anecedent_mem_func[1].membership[x2]], 
-                                                               consequent_mem_func.membership[y]) 
-        elif self.dim == 3:
-            self.R_matrix = np.zeros((len(anecedent_mem_func[0].get_input_range()), 
-                                      len(anecedent_mem_func[1].get_input_range()),
-                                      len(anecedent_mem_func[2].get_input_range()),
-                                      len(consequent_mem_func.get_input_range())))
-
-            for x1 in range(len(anecedent_mem_func[0].get_input_range())):
-                for x2 in range(len(anecedent_mem_func[1].get_input_range())):
-                    for x3 in range(len(anecedent_mem_func[2].get_input_range())):
-                        for y in range(len(consequent_mem_func.get_input_range())):
-                            self.R_matrix[x1][x2][x3][y] = impliction([anecedent_mem_func[0].membership[x1],
-                                                                       anecedent_mem_func[1].membership[x2],
-                                                                       anecedent_mem_func[2].membership[x3]],
-                                                                      consequent_mem_func.membership[y])  
+        shape = [len(mem_func.get_input_range()) for mem_func in anecedent_mem_func] + [len(consequent_mem_func.get_input_range())]
+        anecedents = [np.asarray(mem_func.membership, dtype=float) for mem_func in anecedent_mem_func]
+        consequent = np.asarray(consequent_mem_func.membership, dtype=float)
+
+        match storage:
+            case "dense":
+                self.R_matrix = np.empty(shape, dtype=dtype)
+                self.build_relation(anecedents, consequent, impliction, self.R_matrix, chunk_size)
+            case "memmap":
+                if path is None:
+                    raise ValueError("storage='memmap' needs a path")
+                self.R_matrix = np.memmap(path, dtype=dtype, mode="w+", shape=tuple(shape))
+                self.build_relation(anecedents, consequent, impliction, self.R_matrix, chunk_size)
+                self.R_matrix.flush()
+            case "sparse":
+                support_idx = [np.flatnonzero(anecedent > 0) for anecedent in anecedents]
+                values = np.empty([len(idx) for idx in support_idx] + [shape[-1]], dtype=dtype)
+                self.build_relation([anecedent[idx] for anecedent, idx in zip(anecedents, support_idx)], consequent, impliction, values, chunk_size)
+                default_row = np.asarray(impliction([np.zeros(1)] * self.dim, consequent), dtype=dtype)
+                self.R_matrix = SparseRelation(shape, support_idx, values, default_row)
+            case _:
+                raise ValueError(f"storage {storage} is invalid")
+
+    #Fills out with the relation, anecedent i varies along axis i and the consequent along the last axis
+    @staticmethod
+    def build_relation(anecedents: [np.ndarray], consequent: np.ndarray, impliction, out: np.ndarray, chunk_size = None):
+        dim = len(anecedents)
+        axis_anecedents = []
+        for i, anecedent in enumerate(anecedents):
+            axis_shape = [1] * (dim + 1)
+            axis_shape[i] = len(anecedent)
+            axis_anecedents.append(anecedent.reshape(axis_shape))
+        consequent = consequent.reshape([1] * dim + [len(consequent)])
+
+        if chunk_size is None:
+            chunk_size = max(len(anecedents[0]), 1)
+
+        for start in range(0, len(anecedents[0]), chunk_size):
+            chunk_anecedents = [axis_anecedents[0][start:start+chunk_size]] + axis_anecedents[1:]
+            out[start:start+chunk_size] = np.broadcast_to(impliction(chunk_anecedents, consequent), out[start:start+chunk_size].shape)
+
+    #sup over rows of max(t_norm(combined row, R row)), R_rows can be any array like (dense, low precision, memmap)
+    @staticmethod
+    def compose_rows(combined: np.ndarray, R_rows: np.ndarray, t_norm, chunk_size = None) -> np.ndarray:
+        if chunk_size is None:
+            chunk_size = max(len(R_rows), 1)
+
+        consequent_values = np.zeros((combined.shape[0], R_rows.shape[1]))
+        for start in range(0, len(R_rows), chunk_size):
+            chunk = t_norm(combined[:, start:start+chunk_size, None], np.asarray(R_rows[start:start+chunk_size], dtype=float)[None])
+            consequent_values = np.maximum(consequent_values, chunk.max(axis=1))
+        return consequent_values
+
+    #Composes the primed anecedents with the relation, anecedent_values[i] is anecedent i sampled on anecedent_domains[i]
+    #Give each anecedent_values[i] a leading batch axis, shape (batch, len(anecedent_domains[i])), to compose many inputs at once
+    #chunk_size caps how many relation rows are combined at a time, so huge relations don't need a huge temporary
+    def compose(self, anecedent_values: [np.ndarray], composition = "sup_min", chunk_size = None) -> np.ndarray:
+        t_norm = COMPOSITIONS[composition]
+        batched = np.ndim(anecedent_values[0]) == 2
+        values = [np.atleast_2d(np.asarray(value, dtype=float)) for value in anecedent_values]
+        batch = values[0].shape[0]
+
+        #combine the anecedents into one (batch, anecedent grid 1, ..., anecedent grid n) array
+        combined = values[0]
+        for value in values[1:]:
+            combined = t_norm(combined[..., None], value.reshape([batch] + [1] * (combined.ndim - 1) + [-1]))
+
+        if isinstance(self.R_matrix, SparseRelation):
+            relation = self.R_matrix
+            inside = combined[np.ix_(np.arange(batch), *relation.support_idx)]
+            consequent_values = self.compose_rows(inside.reshape(batch, -1), relation.values.reshape(-1, relation.shape[-1]), t_norm, chunk_size)
+
+            #every row outside of the support is default_row, so only the largest combined value out there matters
+            outside = np.ones(combined.shape[1:], dtype=bool)
+            outside[np.ix_(*relation.support_idx)] = False
+            if np.any(outside):
+                outside_max = combined.reshape(batch, -1)[:, outside.ravel()].max(axis=1)
+                consequent_values = np.maximum(consequent_values, t_norm(outside_max[:, None], relation.default_row[None].astype(float)))
+        else:
+            consequent_values = self.compose_rows(combined.reshape(batch, -1), self.R_matrix.reshape(-1, self.R_matrix.shape[-1]), t_norm, chunk_size)
+
+        return consequent_values if batched else consequent_values[0]
 
     #Returns the consequent membership, must be as many anecedents as there were in initalization
-    def evaluate(self, anecedent_prime: [Membership]) -> Membership:
-        consequent_prime = Membership(self.consequent_domain[0], self.consequent_domain[1], self.consequent_domain[2], init_membership=False)
-
-        match self.dim:
-            case 1:
-                for y in consequent_prime.get_input_range():
-                    max_n = 0.0
-                    for x in anecedent_prime[0].get_input_range():
-                        max_n = max([max_n, min([anecedent_prime[0].interp(x), self.R_matrix[x][y]])])
-                    consequent_prime.set_membership_output(y, max_n)
-            case 2:
-                for y in consequent_prime.get_input_range():
-                    max_n = 0.0
-                    for x1 in anecedent_prime[0].get_input_range():
-                        for x2 in anecedent_prime[1].get_input_range():
-                            max_n = max([max_n, min([anecedent_prime[0].interp(x1),
-                                                     anecedent_prime[1].interp(x2), 
-                                                     self.R_matrix[x1][x2][y]])])
-                    consequent_prime.set_membership_output(y, max_n)
-            case 3:
-                for y in consequent_prime.get_input_range():
-                    max_n = 0.0
-                    for x1 in anecedent_prime[0].get_input_range():
-                        for x2 in anecedent_prime[1].get_input_range():
-                            for x3 in anecedent_prime[2].get_input_range():
-                                max_n = max([max_n, min([anecedent_prime[0].interp(x1),
-                                                         anecedent_prime[1].interp(x2), 
-                                                         anecedent_prime[2].interp(x3), 
-                                                         self.R_matrix[x1][x2][x3][y]])])
-                    consequent_prime.set_membership_output(y, max_n)
-
-        return consequent_prime
+    #The primed anecedents are sampled on the grids the relation was built with
+    def evaluate(self, anecedent_prime: [Membership], composition = "sup_min", chunk_size = None) -> Membership:
+        return self.evaluate_many([anecedent_prime], composition, chunk_size)[0]
+
+    #evaluate for a list of primed anecedent lists, all composed in one pass
+    def evaluate_many(self, anecedent_primes: [[Membership]], composition = "sup_min", chunk_size = None) -> [Membership]:
+        anecedent_values = [np.stack([primes[i].interp_many(self.anecedent_domains[i]) for primes in anecedent_primes])
+                            for i in range(self.dim)]
+        consequent_values = self.compose(anecedent_values, composition, chunk_size)
+
+        consequent_primes = []
+        for values in consequent_values:
+            consequent_prime = Membership(self.consequent_domain[0], self.consequent_domain[1], self.consequent_domain[2], init_membership=False)
+            consequent_prime.membership = values
+            consequent_primes.append(consequent_prime)
+        return consequent_primes